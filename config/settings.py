@@ -36,6 +36,10 @@ class Settings(BaseModel):
     printer_dpi: int = Field(
         default_factory=lambda: int(os.getenv("PRINTER_DPI", "203"))
     )
+    # Format des impressions simulées: "png" (compression rapide) ou "bmp" (sans compression)
+    simulation_format: str = Field(
+        default_factory=lambda: os.getenv("SIMULATION_FORMAT", "png").lower()
+    )
     
     # === Étiquettes === (2" x 1" = 50.8mm x 25.4mm)
     label_width_mm: int = Field(
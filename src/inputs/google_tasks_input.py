@@ -5,6 +5,7 @@ Utilise l'API Google Tasks avec OAuth2.
 
 import logging
 import pickle
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
@@ -360,8 +361,9 @@ class MultiGoogleTasksInput(BaseInput):
                 try:
                     tasks = acc.fetch_tasks(limit=limit)
                     # Ajouter le nom du compte à la source
+                    source = sys.intern(f"google_tasks:{acc.account_name}")
                     for task in tasks:
-                        task.source = f"google_tasks:{acc.account_name}"
+                        task.source = source
                     all_tasks.extend(tasks)
                 except Exception as e:
                     print(f"    ⚠️ Erreur {acc.account_name}: {e}")
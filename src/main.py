@@ -27,9 +27,6 @@ try:
 except ImportError:
     GOOGLE_AVAILABLE = False
 from src.processing.models import Task, Label, TaskList
-from src.processing.llm_parser import LLMParser
-from src.output.label_generator import LabelGenerator
-from src.output.printer import Printer
 from src.storage.database import TaskDatabase
 from src.utils.resilience import health_monitor, safe_execute, classify_error, ErrorSeverity
 
@@ -61,6 +58,11 @@ class KanbanPrinter:
             use_llm: Utiliser le LLM pour le scoring (sinon règles simples)
             skip_printed: Ignorer les tâches déjà imprimées (défaut: True)
         """
+        # Imports différés: --db-stats n'a pas besoin de Pillow / OpenAI / win32
+        from src.processing.llm_parser import LLMParser
+        from src.output.label_generator import LabelGenerator
+        from src.output.printer import get_printer
+        
         self.settings = get_settings()
         self.print_threshold = print_threshold
         self.use_llm = use_llm
@@ -71,7 +73,7 @@ class KanbanPrinter:
         self.parser.print_threshold = print_threshold
         
         self.generator = LabelGenerator()
-        self.printer = Printer()
+        self.printer = get_printer()
         
         # Base de données des tâches imprimées
         self.db = TaskDatabase()
@@ -127,9 +129,12 @@ class KanbanPrinter:
             source_name = source.source_name
             
             # Vérifier si la source est en "circuit ouvert" (trop d'échecs)
-            if health_monitor.should_skip(source_name):
+            if not health_monitor.try_acquire(source_name):
                 health = health_monitor.get_health(source_name)
-                print(f"  ⏸️  {source_name}: désactivé temporairement (retry à {health.next_retry.strftime('%H:%M')})")
+                if health.state == "half_open":
+                    print(f"  ⏸️  {source_name}: essai de reprise déjà en cours")
+                else:
+                    print(f"  ⏸️  {source_name}: désactivé temporairement (retry à {health.next_retry.strftime('%H:%M')})")
                 continue
             
             try:
@@ -171,40 +176,73 @@ class KanbanPrinter:
         emails_skipped = 0
         tasks_from_emails = 0
         skipped_already_printed = 0
+        to_score: list[Task] = []
+        
+        # La base a pu être modifiée depuis le cycle précédent (daemon, autre
+        # processus, run CLI): repartir de l'état réel avant de filtrer
+        self.db.clear_cache()
         
+        # Invariants de boucle (évite de les réévaluer pour chaque tâche)
+        use_llm = self.use_llm and self.parser.is_configured
+        skip_printed = self.skip_printed
+        threshold = self.print_threshold
+        
+        # Séparer emails / autres tâches, puis interroger la base en une fois
+        # (une requête IN par table au lieu d'une requête par tâche)
+        gmail_ids = {}
         for task in tasks:
+            if task.source.startswith(("gmail", "email")):
+                gmail_ids[id(task)] = self._get_gmail_id(task)
+        
+        processed_sources: set[tuple[str, str]] = set()
+        printed_hashes: set[str] = set()
+        if skip_printed:
+            processed_sources = self.db.filter_sources_processed(
+                (task.source, gmail_ids[id(task)])
+                for task in tasks
+                if gmail_ids.get(id(task))
+            )
+            other_tasks = [task for task in tasks if id(task) not in gmail_ids]
+            printed_hashes = self.db.filter_already_printed(
+                task.content_hash for task in other_tasks
+            )
+            # Tâches imprimées avant le passage à BLAKE2b: retrouvées par l'ancien
+            # hash, tant qu'il reste des lignes à convertir
+            if self.db.has_legacy_hashes:
+                printed_hashes |= self.db.adopt_legacy_hashes({
+                    task.legacy_content_hash: task.content_hash
+                    for task in other_tasks
+                    if task.content_hash not in printed_hashes
+                })
+        
+        for task in tasks:
+            source = task.source
+            
             # Pour les emails, vérifier si déjà traité AVANT d'appeler le LLM
-            if task.source.startswith("gmail") or task.source.startswith("email"):
-                # Extraire l'ID Gmail depuis raw_data ou l'ID de la tâche
-                gmail_id = None
-                if task.raw_data:
-                    gmail_id = task.raw_data.get("gmail_id")
-                if not gmail_id:
-                    # Essayer d'extraire depuis l'ID (format: gmail-account-id)
-                    parts = task.id.split("-")
-                    if len(parts) >= 3:
-                        gmail_id = parts[-1]
+            if id(task) in gmail_ids:
+                gmail_id = gmail_ids[id(task)]
                 
                 # Vérifier si cet email a déjà été traité
-                if gmail_id and self.skip_printed and self.db.is_source_processed(task.source, gmail_id):
+                if gmail_id and skip_printed and (source, gmail_id) in processed_sources:
                     emails_skipped += 1
                     continue
                 
-                if self.use_llm and self.parser.is_configured:
+                if use_llm:
                     emails_processed += 1
                     extracted = self.parser.extract_tasks_from_email(task)
                     
                     # Marquer l'email comme traité (même s'il n'a généré aucune tâche)
                     if gmail_id:
                         self.db.mark_source_processed(
-                            source=task.source,
+                            source=source,
                             source_id=gmail_id,
                             original_title=task.title,
                             tasks_extracted=len(extracted)
                         )
+                        processed_sources.add((source, gmail_id))
                     
                     for extracted_task, scoring in extracted:
-                        if scoring["score"] >= self.print_threshold:
+                        if scoring["score"] >= threshold:
                             extracted_task.priority = scoring["priority"]
                             results.append((extracted_task, scoring))
                             tasks_from_emails += 1
@@ -212,17 +250,22 @@ class KanbanPrinter:
                 continue
             
             # Pour les autres sources (non-email), vérifier si déjà imprimé
-            if self.skip_printed and self.db.is_already_printed(task.content_hash):
+            if skip_printed and task.content_hash in printed_hashes:
                 skipped_already_printed += 1
                 continue
             
-            # Pour les autres sources, scoring normal
-            if self.use_llm and self.parser.is_configured:
-                scoring = self.parser.score_task(task)
-            else:
-                scoring = self.parser._score_without_llm(task)
-            
-            if scoring["score"] >= self.print_threshold:
+            # Pour les autres sources, scoring normal (en lot, après le filtrage)
+            to_score.append(task)
+        
+        # Scoring du lot: requêtes LLM en parallèle (LLMParser.score_tasks)
+        if use_llm:
+            scored = self.parser.score_tasks(to_score)
+        else:
+            today = datetime.now()
+            scored = [(task, self.parser._score_without_llm(task, today)) for task in to_score]
+        
+        for task, scoring in scored:
+            if scoring["score"] >= threshold:
                 task.priority = scoring["priority"]
                 results.append((task, scoring))
         
@@ -237,6 +280,19 @@ class KanbanPrinter:
         
         return results
     
+    @staticmethod
+    def _get_gmail_id(task: Task) -> Optional[str]:
+        """Extrait l'ID Gmail depuis raw_data ou l'ID de la tâche."""
+        gmail_id = None
+        if task.raw_data:
+            gmail_id = task.raw_data.get("gmail_id")
+        if not gmail_id:
+            # Essayer d'extraire depuis l'ID (format: gmail-account-id)
+            parts = task.id.split("-")
+            if len(parts) >= 3:
+                gmail_id = parts[-1]
+        return gmail_id
+    
     def generate_labels(self, tasks_with_scores: list[tuple[Task, dict]]) -> list[Path]:
         """Génère les images d'étiquettes."""
         output_files = []
@@ -268,15 +324,18 @@ class KanbanPrinter:
             print("  ⚠️ Imprimante non disponible")
             return 0
         
-        printed = 0
-        for path in image_paths:
-            try:
-                self.printer.print_image(path)
-                printed += 1
-            except Exception as e:
-                print(f"  ❌ Erreur impression {path.name}: {e}")
-        
-        return printed
+        from src.output.printer import PrinterError
+        
+        # Un seul document pour tout le lot (le DC imprimante n'est créé qu'une fois)
+        try:
+            return self.printer.print_images(image_paths)
+        except PrinterError as e:
+            # Les étiquettes sorties avant l'erreur doivent être enregistrées
+            print(f"  ❌ Erreur impression ({e.pages_printed}/{len(image_paths)} étiquettes imprimées): {e}")
+            return e.pages_printed
+        except Exception as e:
+            print(f"  ❌ Erreur impression ({len(image_paths)} étiquettes): {e}")
+            return 0
     
     def run(self, dry_run: bool = False, show_all: bool = False) -> dict:
         """
@@ -374,19 +433,21 @@ class KanbanPrinter:
         Args:
             tasks_with_scores: Liste de (Task, scoring) des tâches imprimées
         """
-        saved = 0
-        for task, scoring in tasks_with_scores:
-            success = self.db.mark_as_printed(
-                task_hash=task.content_hash,
-                source=task.source,
-                original_title=task.title,
-                label_title=scoring.get("label_title", task.title),
-                label_description=scoring.get("label_description", task.description or ""),
-                score=scoring.get("score", 0),
-                source_id=task.id
+        # Même horodatage pour tout le lot (un seul appel à l'horloge)
+        now = datetime.now()
+        saved = self.db.mark_many_printed([
+            (
+                task.content_hash,
+                task.source,
+                task.id,
+                task.title,
+                scoring.get("label_title", task.title),
+                scoring.get("label_description", task.description or ""),
+                scoring.get("score", 0),
+                now
             )
-            if success:
-                saved += 1
+            for task, scoring in tasks_with_scores
+        ])
         
         if saved > 0:
             print(f"  💾 {saved} tâches enregistrées en base")
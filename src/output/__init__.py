@@ -1,5 +1,5 @@
 # Output module - Génération et impression
 from .label_generator import LabelGenerator
-from .printer import Printer
+from .printer import Printer, get_printer
 
-__all__ = ["LabelGenerator", "Printer"]
+__all__ = ["LabelGenerator", "Printer", "get_printer"]
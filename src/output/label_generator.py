@@ -3,25 +3,53 @@ Générateur d'étiquettes avec Pillow.
 Crée des images optimisées pour impression thermique 6cm x 3cm.
 """
 
-import sys
+import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from PIL import Image, ImageDraw, ImageFont
 
-# Ajouter le chemin parent pour les imports
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-
 from config.settings import get_settings
 from src.processing.models import Label, Priority
 
 
+@lru_cache(maxsize=8)
+def _load_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """Charge une police TrueType une seule fois (partagée entre générateurs)."""
+    return ImageFont.truetype(path, size)
+
+
+# Seuil noir/blanc de to_monochrome (table de correspondance pour Image.point)
+_THRESHOLD_LUT = [0 if value < 128 else 255 for value in range(256)]
+
+# Matrice de Bayer 4x4: motif de points fixe pour les aplats gris
+_BAYER_4X4 = (
+    (0, 8, 2, 10),
+    (12, 4, 14, 6),
+    (3, 11, 1, 9),
+    (15, 7, 13, 5),
+)
+
+
 class LabelGenerator:
     """
     Génère des images d'étiquettes pour impression thermique.
     Optimisé pour Munbyn ITPP941 sur étiquettes prédécoupées 6cm x 3cm.
     """
     
+    # Style visuel par indicateur de priorité (high contrast)
+    # Toutes les barres en noir pour un contraste maximal
+    PRIORITY_STYLES = {
+        "○": {"color": "#000000", "bar_color": "#AAAAAA"},      # Low - barre grise
+        "●": {"color": "#000000", "bar_color": "#000000"},      # Medium - barre noire
+        "▲": {"color": "#000000", "bar_color": "#000000"},      # High - barre noire
+        "⚠": {"color": "#000000", "bar_color": "#000000"},      # Urgent - barre noire
+    }
+    
+    # Largeur de la barre latérale de priorité (à gauche)
+    BAR_WIDTH = 5
+    
     def __init__(self):
         self.settings = get_settings()
         self.width = self.settings.label_width_px   # ~480px à 203 DPI
@@ -37,6 +65,13 @@ class LabelGenerator:
         
         # Charger les polices
         self._load_fonts()
+        
+        # Barres latérales pré-rendues (une par couleur), collées telles quelles
+        # (BAR_WIDTH + 1 car le rectangle d'origine incluait la colonne de bord)
+        self._sidebars = {
+            bar_color: self._dot_pattern(self.BAR_WIDTH + 1, self.height, self._gray_value(bar_color))
+            for bar_color in {style["bar_color"] for style in self.PRIORITY_STYLES.values()}
+        }
     
     def _load_fonts(self):
         """Charge les polices avec fallback sur les polices système."""
@@ -70,35 +105,36 @@ class LabelGenerator:
         
         try:
             if bold_font_path:
-                self.font_title = ImageFont.truetype(str(bold_font_path), size_title)
+                self.font_title = _load_font(str(bold_font_path), size_title)
             elif font_path:
-                self.font_title = ImageFont.truetype(str(font_path), size_title)
+                self.font_title = _load_font(str(font_path), size_title)
             else:
                 raise FileNotFoundError("Aucune police trouvée")
             
             if font_path:
-                self.font_body = ImageFont.truetype(str(font_path), size_body)
-                self.font_meta = ImageFont.truetype(str(font_path), size_meta)
+                self.font_body = _load_font(str(font_path), size_body)
+                self.font_meta = _load_font(str(font_path), size_meta)
             else:
                 self.font_body = self.font_title
                 self.font_meta = self.font_title
                 
         except Exception:
             # Fallback sur police par défaut de Pillow
-            self.font_title = ImageFont.load_default()
-            self.font_body = ImageFont.load_default()
-            self.font_meta = ImageFont.load_default()
+            default_font = ImageFont.load_default()
+            self.font_title = default_font
+            self.font_body = default_font
+            self.font_meta = default_font
+    
+    def warmup(self):
+        """
+        Prépare le rendu avant une série d'étiquettes: un rendu à blanc charge
+        les glyphes des polices, pour que la boucle ne paie que le dessin.
+        """
+        self.generate(Label(line1="● Ag", line2="Ag", line3="→ Ag 📅"))
     
     def _get_priority_style(self, indicator: str) -> dict:
         """Retourne le style visuel selon la priorité (high contrast)."""
-        # Toutes les barres en noir pour un contraste maximal
-        styles = {
-            "○": {"color": "#000000", "bar_color": "#AAAAAA"},      # Low - barre grise
-            "●": {"color": "#000000", "bar_color": "#000000"},      # Medium - barre noire
-            "▲": {"color": "#000000", "bar_color": "#000000"},      # High - barre noire
-            "⚠": {"color": "#000000", "bar_color": "#000000"},      # Urgent - barre noire
-        }
-        return styles.get(indicator, styles["●"])
+        return self.PRIORITY_STYLES.get(indicator, self.PRIORITY_STYLES["●"])
     
     def _truncate_text(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> str:
         """Tronque le texte pour qu'il tienne dans la largeur donnée."""
@@ -182,15 +218,11 @@ class LabelGenerator:
         # Style selon priorité
         style = self._get_priority_style(label.priority_indicator)
         
-        # Barre latérale de priorité (à gauche)
-        bar_width = 5
-        draw.rectangle(
-            [(0, 0), (bar_width, self.height)],
-            fill=self._gray_value(style["bar_color"])
-        )
+        # Barre latérale de priorité (à gauche, pré-rendue)
+        img.paste(self._sidebars[style["bar_color"]], (0, 0))
         
         # Ajuster la marge X pour la barre
-        x_start = bar_width + 6
+        x_start = self.BAR_WIDTH + 6
         available_width = self.width - x_start - 4
         
         # Position Y courante
@@ -255,9 +287,33 @@ class LabelGenerator:
         # Formule de luminosité
         return int(0.299 * r + 0.587 * g + 0.114 * b)
     
+    @staticmethod
+    def _dot_pattern(width: int, height: int, gray: int) -> Image.Image:
+        """
+        Aplat gris rendu en points noirs/blancs (motif de Bayer fixe), pour
+        rester visible après le seuillage de to_monochrome.
+        """
+        tile = [
+            bytes(0 if (level * 16 + 8) > gray else 255 for level in row)
+            for row in _BAYER_4X4
+        ]
+        data = b"".join((tile[y % 4] * (width // 4 + 1))[:width] for y in range(height))
+        return Image.frombytes("L", (width, height), data)
+    
+    def to_monochrome(self, img: Image.Image) -> Image.Image:
+        """
+        Convertit une étiquette "L" en mode "1" (1 bit) pour l'imprimante thermique.
+        
+        La tête thermique n'imprime que des points noirs/blancs: simple seuil
+        (pas de tramage, qui moucheterait le texte anti-aliasé), les gris étant
+        déjà tramés à la source (_dot_pattern). Le PNG bit-packé est ~8x plus
+        petit à écrire et à envoyer au spooler.
+        """
+        return img.point(_THRESHOLD_LUT, "1")
+    
     def generate_and_save(self, label: Label, output_path: Optional[Path] = None) -> Path:
         """
-        Génère une étiquette et la sauvegarde en PNG.
+        Génère une étiquette et la sauvegarde en PNG 1 bit.
         
         Args:
             label: Label à générer
@@ -266,11 +322,11 @@ class LabelGenerator:
         Returns:
             Chemin du fichier généré
         """
-        img = self.generate(label)
+        img = self.to_monochrome(self.generate(label))
         
         if output_path is None:
             # Générer un nom unique
-            timestamp = __import__("time").strftime("%Y%m%d_%H%M%S")
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
             filename = f"label_{label.task_id or timestamp}.png"
             output_path = self.settings.output_dir / filename
         
@@ -3,23 +3,33 @@ Interface d'impression pour Windows via win32print.
 Envoie les images générées à l'imprimante Munbyn ITPP941.
 """
 
-import sys
 import tempfile
+import time
+from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
-from typing import Optional, Union
+from typing import Iterable, Optional, Union
 
-from PIL import Image
-
-# Ajouter le chemin parent pour les imports
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from PIL import Image, ImageDraw, ImageFont
 
 from config.settings import get_settings
 
 
+# Police par défaut de Pillow (page de test), chargée une seule fois
+_DEFAULT_FONT = ImageFont.load_default()
+
+# Interligne de la page de test: pas de 30 px entre lignes (y = 20, 50, 80, 110),
+# Pillow espaçant les lignes de la hauteur de "A" plus `spacing`
+_TEST_PAGE_SPACING = 30 - _DEFAULT_FONT.getbbox("A")[3]
+
+
 class PrinterError(Exception):
     """Erreur liée à l'impression."""
-    pass
+    
+    def __init__(self, message: str, pages_printed: int = 0):
+        super().__init__(message)
+        # Étiquettes réellement imprimées (en tête du lot) avant l'erreur
+        self.pages_printed = pages_printed
 
 
 class Printer:
@@ -28,6 +38,9 @@ class Printer:
     Conçu pour Munbyn ITPP941 sur Windows.
     """
     
+    # Durée de validité du cache des imprimantes (secondes)
+    PRINTERS_CACHE_TTL = 5.0
+    
     def __init__(self, printer_name: Optional[str] = None):
         """
         Initialise l'interface d'impression.
@@ -43,6 +56,12 @@ class Printer:
         self._win32ui = None
         self._win32con = None
         self._load_win32_modules()
+        
+        # Caches (noms, ensemble des noms, horodatage) et (défaut, horodatage)
+        self._printers_cache: Optional[tuple[tuple[str, ...], frozenset[str], float]] = None
+        self._default_printer_cache: Optional[tuple[Optional[str], float]] = None
+        # Zone imprimable (HORZRES, VERTRES) par imprimante, constante pour un pilote donné
+        self._printable_size: dict[str, tuple[int, int]] = {}
     
     def _load_win32_modules(self):
         """Charge les modules win32 si disponibles."""
@@ -72,27 +91,47 @@ class Printer:
         if not self.is_available:
             return ["[win32print non disponible - simulation]"]
         
-        printers = []
-        flags = self._win32print.PRINTER_ENUM_LOCAL | self._win32print.PRINTER_ENUM_CONNECTIONS
-        for printer in self._win32print.EnumPrinters(flags, None, 1):
-            printers.append(printer[2])  # Le nom est à l'index 2
+        return list(self._get_printers()[0])
+    
+    def _get_printers(self) -> tuple[tuple[str, ...], frozenset[str]]:
+        """Énumère les imprimantes (résultat mis en cache PRINTERS_CACHE_TTL secondes)."""
+        now = time.monotonic()
+        if self._printers_cache and now - self._printers_cache[2] < self.PRINTERS_CACHE_TTL:
+            return self._printers_cache[0], self._printers_cache[1]
         
-        return printers
+        flags = self._win32print.PRINTER_ENUM_LOCAL | self._win32print.PRINTER_ENUM_CONNECTIONS
+        # Le nom est à l'index 2
+        names = tuple(printer[2] for printer in self._win32print.EnumPrinters(flags, None, 1))
+        self._printers_cache = (names, frozenset(names), now)
+        return names, self._printers_cache[1]
+    
+    def _invalidate_printer_cache(self):
+        """Force une nouvelle énumération des imprimantes au prochain appel."""
+        self._printers_cache = None
+        self._default_printer_cache = None
+        self._printable_size.clear()
     
     def printer_exists(self) -> bool:
         """Vérifie si l'imprimante configurée existe."""
         if not self.is_available:
             return False
-        return self.printer_name in self.list_printers()
+        return self.printer_name in self._get_printers()[1]
     
     def get_default_printer(self) -> Optional[str]:
         """Retourne le nom de l'imprimante par défaut."""
         if not self.is_available:
             return None
+        
+        now = time.monotonic()
+        if self._default_printer_cache and now - self._default_printer_cache[1] < self.PRINTERS_CACHE_TTL:
+            return self._default_printer_cache[0]
+        
         try:
-            return self._win32print.GetDefaultPrinter()
+            default = self._win32print.GetDefaultPrinter()
         except Exception:
-            return None
+            default = None
+        self._default_printer_cache = (default, now)
+        return default
     
     def print_image(self, image: Union[Image.Image, Path, str]) -> bool:
         """
@@ -107,36 +146,65 @@ class Printer:
         Raises:
             PrinterError: En cas d'erreur d'impression
         """
-        # Charger l'image si nécessaire
-        if isinstance(image, (str, Path)):
-            image = Image.open(image)
+        return self.print_images([image]) == 1
+    
+    def print_images(self, images: Iterable[Union[Image.Image, Path, str]]) -> int:
+        """
+        Imprime plusieurs images en un seul document (une page par étiquette).
+        Le device context de l'imprimante n'est créé qu'une fois pour tout le lot.
+        
+        Args:
+            images: Images PIL, chemins vers fichiers, ou chaînes de chemin
+            
+        Returns:
+            Nombre d'étiquettes imprimées
+            
+        Raises:
+            PrinterError: En cas d'erreur d'impression (pages_printed indique combien
+                d'étiquettes, en tête du lot, sont sorties avant l'erreur)
+        """
+        # Charger les images si nécessaire
+        images = [
+            Image.open(image) if isinstance(image, (str, Path)) else image
+            for image in images
+        ]
+        if not images:
+            return 0
         
         if not self.is_available:
-            return self._simulate_print(image)
+            return sum(1 for image in images if self._simulate_print(image))
         
         if not self.printer_exists():
             available = self.list_printers()
+            self._invalidate_printer_cache()
             raise PrinterError(
                 f"Imprimante '{self.printer_name}' non trouvée. "
                 f"Disponibles: {available}"
             )
         
         try:
-            return self._print_via_gdi(image)
+            return self._print_via_gdi(images)
         except Exception as e:
-            raise PrinterError(f"Erreur d'impression: {e}")
+            if len(images) == 1:
+                self._invalidate_printer_cache()
+                raise PrinterError(f"Erreur d'impression: {e}")
+        
+        # Lot annulé (AbortDoc): un document par étiquette pour savoir lesquelles sortent
+        printed = 0
+        for image in images:
+            try:
+                printed += self._print_via_gdi([image])
+            except Exception as e:
+                self._invalidate_printer_cache()
+                raise PrinterError(f"Erreur d'impression: {e}", pages_printed=printed)
+        return printed
     
-    def _print_via_gdi(self, image: Image.Image) -> bool:
+    def _print_via_gdi(self, images: list[Image.Image]) -> int:
         """
         Imprime via l'API GDI de Windows.
         Méthode fiable pour les imprimantes thermiques.
+        Un seul document (StartDoc/EndDoc) contient une page par image.
         """
-        # Convertir en RGB si nécessaire (GDI préfère RGB)
-        if image.mode == "L":
-            image = image.convert("RGB")
-        elif image.mode != "RGB":
-            image = image.convert("RGB")
-        
         # Créer un device context pour l'imprimante
         hdc = self._win32ui.CreateDC()
         hdc.CreatePrinterDC(self.printer_name)
@@ -144,37 +212,62 @@ class Printer:
         try:
             # Démarrer le document
             hdc.StartDoc("KanbanPrinter Label")
-            hdc.StartPage()
-            
-            # Obtenir les dimensions de la zone imprimable
-            printable_width = hdc.GetDeviceCaps(self._win32con.HORZRES)
-            printable_height = hdc.GetDeviceCaps(self._win32con.VERTRES)
-            
-            # Dimensions de l'image
-            img_width, img_height = image.size
-            
-            # Calculer le ratio pour remplir au maximum sans déformer
-            ratio_w = printable_width / img_width
-            ratio_h = printable_height / img_height
-            ratio = min(ratio_w, ratio_h)
             
-            # Nouvelles dimensions
-            new_width = int(img_width * ratio)
-            new_height = int(img_height * ratio)
+            # Obtenir les dimensions de la zone imprimable (en cache après le 1er document)
+            printable_size = self._printable_size.get(self.printer_name)
+            if printable_size is None:
+                printable_size = (
+                    hdc.GetDeviceCaps(self._win32con.HORZRES),
+                    hdc.GetDeviceCaps(self._win32con.VERTRES),
+                )
+                self._printable_size[self.printer_name] = printable_size
+            printable_width, printable_height = printable_size
             
-            # Centrer l'image
-            x_offset = (printable_width - new_width) // 2
-            y_offset = (printable_height - new_height) // 2
-            
-            # Créer un bitmap compatible
-            dib = ImageWin_Dib(image)
-            dib.draw(hdc.GetHandleOutput(), (x_offset, y_offset, x_offset + new_width, y_offset + new_height))
+            dib = None
+            for image in images:
+                # ImageWin.Dib gère directement "1" (PNG générés) et "L": ne convertir
+                # en RGB que les autres modes (RGBA, P, CMYK...)
+                if image.mode not in ("RGB", "L", "1"):
+                    image = image.convert("RGB")
+                
+                # Dimensions de l'image
+                img_width, img_height = image.size
+                
+                # Calculer le ratio pour remplir au maximum sans déformer
+                ratio_w = printable_width / img_width
+                ratio_h = printable_height / img_height
+                ratio = min(ratio_w, ratio_h)
+                
+                # Nouvelles dimensions
+                new_width = int(img_width * ratio)
+                new_height = int(img_height * ratio)
+                
+                # Centrer l'image
+                x_offset = (printable_width - new_width) // 2
+                y_offset = (printable_height - new_height) // 2
+                
+                # Réutiliser le bitmap si l'étiquette a le même format que la précédente
+                if dib is not None and dib.matches(image):
+                    dib.paste(image)
+                else:
+                    dib = ImageWin_Dib(image)
+                
+                hdc.StartPage()
+                dib.draw(hdc.GetHandleOutput(), (x_offset, y_offset, x_offset + new_width, y_offset + new_height))
+                hdc.EndPage()
             
             # Terminer l'impression
-            hdc.EndPage()
             hdc.EndDoc()
             
-            return True
+            return len(images)
+            
+        except Exception:
+            # Document incomplet: l'annuler pour que le spouleur n'imprime pas un lot partiel
+            try:
+                hdc.AbortDoc()
+            except Exception:
+                pass
+            raise
             
         finally:
             hdc.DeleteDC()
@@ -187,10 +280,15 @@ class Printer:
         output_dir = self.settings.output_dir
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        timestamp = __import__("time").strftime("%Y%m%d_%H%M%S")
-        output_path = output_dir / f"simulated_print_{timestamp}.png"
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         
-        image.save(output_path)
+        # Fichier de debug: privilégier la vitesse d'écriture à la taille
+        if self.settings.simulation_format == "bmp":
+            output_path = output_dir / f"simulated_print_{timestamp}.bmp"
+            image.save(output_path, "BMP")
+        else:
+            output_path = output_dir / f"simulated_print_{timestamp}.png"
+            image.save(output_path, "PNG", compress_level=1)
         print(f"🖨️ [SIMULATION] Image sauvegardée: {output_path}")
         
         return True
@@ -207,32 +305,70 @@ class Printer:
         height = self.settings.label_height_px
         
         img = Image.new("L", (width, height), color=255)
-        from PIL import ImageDraw
         draw = ImageDraw.Draw(img)
         
         # Dessiner un cadre
         draw.rectangle([(5, 5), (width - 6, height - 6)], outline=0, width=2)
         
-        # Texte de test
-        draw.text((20, 20), "KanbanPrinter", fill=0)
-        draw.text((20, 50), f"Test: {self.printer_name}", fill=0)
-        draw.text((20, 80), f"Size: {width}x{height}px", fill=0)
-        draw.text((20, 110), f"DPI: {self.settings.printer_dpi}", fill=0)
+        # Texte de test (un seul rendu multi-lignes)
+        text = (
+            "KanbanPrinter\n"
+            f"Test: {self.printer_name}\n"
+            f"Size: {width}x{height}px\n"
+            f"DPI: {self.settings.printer_dpi}"
+        )
+        draw.multiline_text((20, 20), text, font=_DEFAULT_FONT, fill=0, spacing=_TEST_PAGE_SPACING)
         
         return self.print_image(img)
 
 
+@lru_cache(maxsize=4)
+def get_printer(printer_name: Optional[str] = None) -> Printer:
+    """
+    Retourne une instance Printer partagée par nom d'imprimante.
+    Les settings et les modules win32 ne sont chargés qu'une fois par imprimante.
+    """
+    return Printer(printer_name)
+
+
 # Helper pour l'impression Windows
 class ImageWin_Dib:
     """Wrapper pour PIL ImageWin.Dib avec fallback."""
     
     def __init__(self, image: Image.Image):
         self.image = image
+        self._rgb_fallback = False
         try:
             from PIL import ImageWin
-            self._dib = ImageWin.Dib(image)
         except ImportError:
             self._dib = None
+            return
+        
+        try:
+            self._dib = ImageWin.Dib(image)
+        except (TypeError, ValueError):
+            # DIB gris/1-bit refusé: dupliquer le canal en RGB (Image.merge)
+            if image.mode not in ("L", "1"):
+                raise
+            self._rgb_fallback = True
+            self._dib = ImageWin.Dib(self._as_rgb(image))
+    
+    @staticmethod
+    def _as_rgb(image: Image.Image) -> Image.Image:
+        """Image "L" ou "1" vue en RGB (le même canal pour R, G et B)."""
+        if image.mode == "1":
+            image = image.convert("L")
+        return Image.merge("RGB", (image, image, image))
+    
+    def matches(self, image: Image.Image) -> bool:
+        """Vérifie si le bitmap peut être réutilisé pour cette image (même mode/taille)."""
+        return image.mode == self.image.mode and image.size == self.image.size
+    
+    def paste(self, image: Image.Image):
+        """Recopie une image de même format dans le bitmap existant."""
+        self.image = image
+        if self._dib:
+            self._dib.paste(self._as_rgb(image) if self._rgb_fallback else image)
     
     def draw(self, hdc, box):
         if self._dib:
@@ -241,7 +377,7 @@ class ImageWin_Dib:
 
 if __name__ == "__main__":
     # Test du module printer
-    printer = Printer()
+    printer = get_printer()
     
     print("=== Test du module Printer ===\n")
     print(f"Module win32 disponible: {printer.is_available}")
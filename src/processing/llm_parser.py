@@ -4,26 +4,216 @@ Détermine l'importance/urgence de chaque tâche.
 """
 
 import json
-import sys
-from datetime import datetime, timezone
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
 from typing import Optional
 
-# Ajouter le chemin parent pour les imports
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-
 from config.settings import get_settings
 from src.processing.models import Task, Priority, TaskList
 
+# orjson (optionnel) parse les réponses JSON plus vite que json.
+# orjson.JSONDecodeError hérite de json.JSONDecodeError: mêmes except.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+# Clients OpenAI partagés par clé API (voir LLMParser._get_client)
+_CLIENTS: dict[str, object] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+# Mots-clés urgents (scoring sans LLM), compilés une seule fois
+_URGENT_RE = re.compile(r"urgent|asap|important|critical|deadline|now", re.IGNORECASE)
+
+# Priorité pour chaque score 0-100 (>= 80 urgent, >= 65 high, >= 40 medium, sinon low)
+_SCORE_PRIORITIES: tuple[Priority, ...] = tuple(
+    Priority.URGENT if score >= 80
+    else Priority.HIGH if score >= 65
+    else Priority.MEDIUM if score >= 40
+    else Priority.LOW
+    for score in range(101)
+)
+
+
+# Schémas JSON imposés côté serveur (structured outputs): la réponse est
+# toujours un JSON valide conforme, les prompts n'ont plus à décrire le format.
+_PRIORITY_VALUES = ["urgent", "high", "medium", "low"]
+
+_SCORING_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "task_scoring",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "score": {"type": "integer", "description": "0-100"},
+                "priority": {"type": "string", "enum": _PRIORITY_VALUES},
+                "reason": {"type": "string", "description": "10 words max, same language as the task"},
+                "label_title": {"type": "string", "description": "25 chars max, no filler words"},
+                "label_description": {"type": "string", "description": "280 chars max, specific action and key details"},
+            },
+            "required": ["score", "priority", "reason", "label_title", "label_description"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+_EMAIL_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "email_tasks",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "tasks": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "title": {"type": "string", "description": "25 chars max"},
+                            "desc": {"type": "string", "description": "280 chars max, non-empty"},
+                            "score": {"type": "integer", "description": "0-100"},
+                            "priority": {"type": "string", "enum": _PRIORITY_VALUES},
+                            "reason": {"type": "string", "description": "10 words max"},
+                        },
+                        "required": ["title", "desc", "score", "priority", "reason"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["tasks"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+# Parties statiques des prompts (construites une seule fois à l'import).
+# Elles sont placées EN TÊTE du message utilisateur: le préfixe identique d'un
+# appel à l'autre profite du prompt caching d'OpenAI (moins de tokens facturés,
+# réponse plus rapide). Les données variables (date, tâche) viennent à la fin.
+_SCORING_INSTRUCTIONS = """Score this task (0-100) and create a label.
+
+SCORING:
+90-100: CRITICAL (overdue, blocking)
+70-89: HIGH (due soon, important)
+50-69: MEDIUM (normal)
+0-49: LOW/SKIP
 
-def _normalize_datetime(dt: Optional[datetime]) -> Optional[datetime]:
-    """Convertit un datetime en naive UTC pour comparaison."""
-    if dt is None:
-        return None
-    # Si aware (a une timezone), convertir en UTC puis rendre naive
-    if dt.tzinfo is not None:
-        return dt.astimezone(timezone.utc).replace(tzinfo=None)
-    return dt
+Rules: overdue +30, >7 days old +15, urgent keywords +20, no action -20
+"""
+
+_EMAIL_INSTRUCTIONS = """Analyze this email and extract ACTIONABLE TASKS only.
+
+RULES:
+- Extract ONLY concrete actions I need to do (reply, review, attend, submit, etc.)
+- NO task if email is: newsletter, promo, notification, FYI, spam, automated
+- Use TODAY to judge relevance. If an event/date is in the past, create NO task only if there is nothing left to do.
+- Past events can still produce tasks when follow-up makes sense (send minutes, reimburse, reschedule, post-mortem, ask for recording, etc.)
+- ONE email can have 0, 1, or MULTIPLE tasks
+- Each task must start with an ACTION verb (Reply/Confirm/Review/Submit/Attend/Call/etc.)
+- Do NOT copy/paste the email subject as the task title
+- Title must be SHORT and ACTIONABLE (max 25 chars)
+- Description must be SPECIFIC and NON-EMPTY (max 280 chars): what to do + key details (who/what/when/where/link/doc)
+- Prefer a LONGER description when information exists (target 120-200 chars), because the label can show multiple lines
+- Use 1–2 short sentences; include concrete details and next step (ex: "Répondre à X", "Confirmer présence", "préparer Y")
+- Avoid filler words and long phrases that add no meaning
+- Write title, desc and reason in the same language as the email
+
+EXAMPLES:
+- "Meeting invite for Monday" → {"tasks": [{"title": "Confirmer réunion", "desc": "Confirmer présence lundi 14h", "score": 75, "priority": "high", "reason": "Événement à confirmer"}]}
+- "Newsletter" → {"tasks": []}
+- "Event happened yesterday (no action)" → {"tasks": []}
+- "Event happened yesterday, send notes" → {"tasks": [{"title": "Envoyer CR", "desc": "Envoyer compte-rendu aux participants + actions", "score": 65, "priority": "medium", "reason": "Suivi utile"}]}
+- "Please review doc and sign contract" → {"tasks": [{"title": "Relire doc", "desc": "Lire PJ et noter points à corriger", "score": 70, "priority": "high", "reason": "Action demandée"}, {"title": "Signer contrat", "desc": "Signer contrat et renvoyer à l'expéditeur", "score": 80, "priority": "high", "reason": "Signature requise"}]}
+"""
+
+
+@lru_cache(maxsize=1024)
+def _score_rules(
+    title: str,
+    description: Optional[str],
+    category: Optional[str],
+    source: str,
+    task_priority: Priority,
+    days_overdue: Optional[int],
+    days_until: Optional[int],
+    days_old: Optional[int],
+) -> tuple[int, Priority, str, str, str]:
+    """
+    Règles du scoring sans LLM (fonction pure, mémoïsée).
+    Les dates sont passées en jours (retard, échéance, ancienneté) pour que
+    le cache reste valable d'une exécution à l'autre dans la même journée.
+    
+    Returns:
+        Tuple (score, priority, reason, label_title, label_description)
+    """
+    score = 50  # Score de base
+    reasons = []
+    
+    # Règle 1: Tâche en retard
+    if days_overdue is not None:
+        score += min(30, days_overdue * 5)
+        reasons.append(f"Overdue {days_overdue}d")
+    
+    # Règle 2: Échéance proche
+    elif days_until is not None:
+        if days_until <= 1:
+            score += 25
+            reasons.append("Due very soon")
+        elif days_until <= 3:
+            score += 15
+            reasons.append("Due soon")
+    
+    # Règle 3: Ancienneté (créée il y a longtemps)
+    if days_old is not None:
+        if days_old > 14:
+            score += 15
+            reasons.append(f"Old task ({days_old}d)")
+        elif days_old > 7:
+            score += 10
+            reasons.append(f"Pending {days_old}d")
+    
+    # Règle 4: Priorité initiale
+    priority_bonus = {
+        Priority.URGENT: 20,
+        Priority.HIGH: 10,
+        Priority.MEDIUM: 0,
+        Priority.LOW: -10,
+    }
+    score += priority_bonus.get(task_priority, 0)
+    
+    # Règle 5: Mots-clés urgents dans le titre
+    if _URGENT_RE.search(title):
+        score += 15
+        reasons.append("Urgent keywords")
+    
+    # Normaliser le score
+    score = max(0, min(100, score))
+    
+    # Déterminer la priorité
+    priority = _SCORE_PRIORITIES[score]
+    
+    # Pour les emails, générer un titre actionnable basique
+    label_title = title
+    label_description = description or ""
+    if source.startswith("gmail") or source.startswith("email"):
+        # Simplifier le titre d'email
+        label_title = f"Email: {title[:40]}"
+        label_description = category or "Voir email"
+    
+    reason = "; ".join(reasons) if reasons else "Default scoring"
+    return score, priority, reason, label_title, label_description
 
 
 class LLMParserError(Exception):
@@ -40,6 +230,9 @@ class LLMParser:
     # Seuil par défaut pour imprimer (score >= ce seuil)
     DEFAULT_PRINT_THRESHOLD = 70
     
+    # Nombre max de requêtes OpenAI simultanées dans score_tasks
+    MAX_CONCURRENT_REQUESTS = 8
+    
     def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
         """
         Initialise le parser LLM.
@@ -62,22 +255,31 @@ class LLMParser:
         return bool(self.api_key and self.api_key.startswith("sk-"))
     
     def _get_client(self):
-        """Initialise le client OpenAI (lazy loading)."""
+        """
+        Retourne le client OpenAI (lazy loading).
+        Un seul client par clé API pour tout le processus: les parsers
+        partagent ainsi le pool de connexions HTTP (keep-alive, TLS).
+        """
         if self._client is None:
-            try:
-                from openai import OpenAI
-                self._client = OpenAI(api_key=self.api_key)
-            except ImportError:
-                raise LLMParserError("openai package not installed. Run: pip install openai")
+            with _CLIENTS_LOCK:
+                client = _CLIENTS.get(self.api_key)
+                if client is None:
+                    try:
+                        from openai import OpenAI
+                    except ImportError:
+                        raise LLMParserError("openai package not installed. Run: pip install openai")
+                    client = OpenAI(api_key=self.api_key, max_retries=2)
+                    _CLIENTS[self.api_key] = client
+            self._client = client
         return self._client
     
-    def _build_scoring_prompt(self, task: Task) -> str:
+    def _build_scoring_prompt(self, task: Task, today: Optional[datetime] = None) -> str:
         """Construit le prompt pour scorer une tâche (non-email)."""
         
-        today = datetime.now()
+        today = today or datetime.now()
         today_str = today.strftime("%Y-%m-%d")
-        created_at = _normalize_datetime(task.created_at)
-        due_date = _normalize_datetime(task.due_date)
+        created_at = task.created_at_utc
+        due_date = task.due_date_utc
         created_days_ago = (today - created_at).days if created_at else 0
         
         due_info = ""
@@ -92,36 +294,25 @@ class LLMParser:
             else:
                 due_info = f"Due in {days_until_due} days"
         
-        return f"""Score this task (0-100) and create a label.
-
-    TODAY: {today_str}
-
-TASK:
-- Source: {task.source}
-- Title: {task.title}
-- Description: {task.description or "None"}
-- Created: {created_days_ago} days ago
-- Due: {due_info or "None"}
-- Priority: {task.priority.value}
-
-SCORING:
-90-100: CRITICAL (overdue, blocking)
-70-89: HIGH (due soon, important)
-50-69: MEDIUM (normal)
-0-49: LOW/SKIP
-
-Rules: overdue +30, >7 days old +15, urgent keywords +20, no action -20
-
-Respond JSON only:
-{{"score": <0-100>, "priority": "<urgent|high|medium|low>", "reason": "<10 words max, same language>", "label_title": "<25 chars max, no filler words>", "label_description": "<280 chars max, specific action and key details>"}}
-"""
+        # Assemblage en un seul join (pas de concaténations intermédiaires)
+        return "".join((
+            _SCORING_INSTRUCTIONS,
+            "\nTODAY: ", today_str,
+            "\n\nTASK:\n- Source: ", task.source,
+            "\n- Title: ", task.title,
+            "\n- Description: ", task.description or "None",
+            "\n- Created: ", str(created_days_ago), " days ago",
+            "\n- Due: ", due_info or "None",
+            "\n- Priority: ", task.priority.value,
+            "\n",
+        ))
     
     def _build_email_extraction_prompt(self, task: Task) -> str:
         """Construit le prompt pour extraire les tâches d'un email."""
         
         today = datetime.now()
         today_str = today.strftime("%Y-%m-%d")
-        created_at = _normalize_datetime(task.created_at)
+        created_at = task.created_at_utc
         created_days_ago = (today - created_at).days if created_at else 0
         
         # Récupérer plus de contexte depuis raw_data
@@ -129,40 +320,16 @@ Respond JSON only:
         sender = raw.get("from", "Unknown")
         snippet = raw.get("snippet", task.description or "")
         
-        return f"""Analyze this email and extract ACTIONABLE TASKS only.
-
-    TODAY: {today_str}
-
-EMAIL:
-- Subject: {task.title}
-- From: {sender}
-- Content: {snippet}
-- Received: {created_days_ago} days ago
-
-RULES:
-- Extract ONLY concrete actions I need to do (reply, review, attend, submit, etc.)
-- NO task if email is: newsletter, promo, notification, FYI, spam, automated
-- Use TODAY to judge relevance. If an event/date is in the past, create NO task only if there is nothing left to do.
-- Past events can still produce tasks when follow-up makes sense (send minutes, reimburse, reschedule, post-mortem, ask for recording, etc.)
-- ONE email can have 0, 1, or MULTIPLE tasks
-- Each task must start with an ACTION verb (Reply/Confirm/Review/Submit/Attend/Call/etc.)
-- Do NOT copy/paste the email subject as the task title
-- Title must be SHORT and ACTIONABLE (max 25 chars)
-- Description must be SPECIFIC and NON-EMPTY (max 280 chars): what to do + key details (who/what/when/where/link/doc)
-- Prefer a LONGER description when information exists (target 120-200 chars), because the label can show multiple lines
-- Use 1–2 short sentences; include concrete details and next step (ex: "Répondre à X", "Confirmer présence", "préparer Y")
-- Avoid filler words and long phrases that add no meaning
-
-EXAMPLES:
-- "Meeting invite for Monday" → {{"tasks": [{{"title": "Confirmer réunion", "desc": "Confirmer présence lundi 14h", "score": 75, "reason": "Événement à confirmer"}}]}}
-- "Newsletter" → {{"tasks": []}}
-- "Event happened yesterday (no action)" → {{"tasks": []}}
-- "Event happened yesterday, send notes" → {{"tasks": [{{"title": "Envoyer CR", "desc": "Envoyer compte-rendu aux participants + actions", "score": 65, "reason": "Suivi utile"}}]}}
-- "Please review doc and sign contract" → {{"tasks": [{{"title": "Relire doc", "desc": "Lire PJ et noter points à corriger", "score": 70, "reason": "Action demandée"}}, {{"title": "Signer contrat", "desc": "Signer contrat et renvoyer à l'expéditeur", "score": 80, "reason": "Signature requise"}}]}}
-
-Respond JSON only (same language as email):
-{{"tasks": [{{"title": "<25 chars>", "desc": "<280 chars, non-empty>", "score": <0-100>, "priority": "<urgent|high|medium|low>", "reason": "<10 words max>"}}]}}
-"""
+        # Assemblage en un seul join (pas de concaténations intermédiaires)
+        return "".join((
+            _EMAIL_INSTRUCTIONS,
+            "\nTODAY: ", today_str,
+            "\n\nEMAIL:\n- Subject: ", task.title,
+            "\n- From: ", str(sender),
+            "\n- Content: ", str(snippet),
+            "\n- Received: ", str(created_days_ago), " days ago",
+            "\n",
+        ))
     
     def extract_tasks_from_email(self, email_task: Task) -> list[tuple[Task, dict]]:
         """
@@ -189,10 +356,11 @@ Respond JSON only (same language as email):
                 ],
                 temperature=0.3,
                 max_completion_tokens=600,
+                response_format=_EMAIL_RESPONSE_FORMAT,
             )
             
             content = response.choices[0].message.content.strip()
-            result = json.loads(content)
+            result = _json_loads(content)
             
             extracted_tasks = []
             tasks_data = result.get("tasks", [])
@@ -251,19 +419,20 @@ Respond JSON only (same language as email):
             print(f"    ⚠️ Email extraction error: {e}")
             return []
     
-    def score_task(self, task: Task) -> dict:
+    def score_task(self, task: Task, today: Optional[datetime] = None) -> dict:
         """
         Score une tâche individuellement.
         
         Args:
             task: Tâche à analyser
+            today: Date de référence (partagée par un lot, défaut: maintenant)
             
         Returns:
             dict avec score, priority, reason, should_print
         """
         if not self.is_configured:
             # Fallback sans LLM - scoring basique
-            return self._score_without_llm(task)
+            return self._score_without_llm(task, today)
         
         try:
             client = self._get_client()
@@ -272,16 +441,17 @@ Respond JSON only (same language as email):
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a task prioritization assistant. Respond only with valid JSON."},
-                    {"role": "user", "content": self._build_scoring_prompt(task)}
+                    {"role": "user", "content": self._build_scoring_prompt(task, today)}
                 ],
                 temperature=0.3,  # Plus déterministe
                 max_completion_tokens=400,
+                response_format=_SCORING_RESPONSE_FORMAT,
             )
             
             content = response.choices[0].message.content.strip()
             
             # Parser la réponse JSON
-            result = json.loads(content)
+            result = _json_loads(content)
             
             # Valider et normaliser
             score = max(0, min(100, int(result.get("score", 50))))
@@ -301,89 +471,44 @@ Respond JSON only (same language as email):
             
         except json.JSONDecodeError as e:
             print(f"⚠️ LLM response not valid JSON: {e}")
-            return self._score_without_llm(task)
+            return self._score_without_llm(task, today)
         except Exception as e:
             print(f"⚠️ LLM error: {e}")
-            return self._score_without_llm(task)
+            return self._score_without_llm(task, today)
     
-    def _score_without_llm(self, task: Task) -> dict:
+    def _score_without_llm(self, task: Task, today: Optional[datetime] = None) -> dict:
         """
         Scoring de fallback sans LLM (basé sur des règles simples).
+        Extrait les écarts de dates puis délègue à _score_rules (mémoïsé).
         """
-        score = 50  # Score de base
-        reasons = []
+        today = today or datetime.now()
         
-        today = datetime.now()
-        
-        # Règle 1: Tâche en retard
-        due_date = _normalize_datetime(task.due_date)
+        days_overdue = days_until = days_old = None
+        due_date = task.due_date_utc
         if due_date and due_date < today:
             days_overdue = (today - due_date).days
-            score += min(30, days_overdue * 5)
-            reasons.append(f"Overdue {days_overdue}d")
-        
-        # Règle 2: Échéance proche
         elif due_date:
             days_until = (due_date - today).days
-            if days_until <= 1:
-                score += 25
-                reasons.append("Due very soon")
-            elif days_until <= 3:
-                score += 15
-                reasons.append("Due soon")
         
-        # Règle 3: Ancienneté (créée il y a longtemps)
-        created_at = _normalize_datetime(task.created_at)
+        created_at = task.created_at_utc
         if created_at:
             days_old = (today - created_at).days
-            if days_old > 14:
-                score += 15
-                reasons.append(f"Old task ({days_old}d)")
-            elif days_old > 7:
-                score += 10
-                reasons.append(f"Pending {days_old}d")
-        
-        # Règle 4: Priorité initiale
-        priority_bonus = {
-            Priority.URGENT: 20,
-            Priority.HIGH: 10,
-            Priority.MEDIUM: 0,
-            Priority.LOW: -10,
-        }
-        score += priority_bonus.get(task.priority, 0)
-        
-        # Règle 5: Mots-clés urgents dans le titre
-        urgent_keywords = ["urgent", "asap", "important", "critical", "deadline", "now"]
-        title_lower = task.title.lower()
-        if any(kw in title_lower for kw in urgent_keywords):
-            score += 15
-            reasons.append("Urgent keywords")
         
-        # Normaliser le score
-        score = max(0, min(100, score))
-        
-        # Déterminer la priorité
-        if score >= 80:
-            priority = Priority.URGENT
-        elif score >= 65:
-            priority = Priority.HIGH
-        elif score >= 40:
-            priority = Priority.MEDIUM
-        else:
-            priority = Priority.LOW
-        
-        # Pour les emails, générer un titre actionnable basique
-        label_title = task.title
-        label_description = task.description or ""
-        if task.source.startswith("gmail") or task.source.startswith("email"):
-            # Simplifier le titre d'email
-            label_title = f"Email: {task.title[:40]}"
-            label_description = task.category or "Voir email"
+        score, priority, reason, label_title, label_description = _score_rules(
+            task.title,
+            task.description,
+            task.category,
+            task.source,
+            task.priority,
+            days_overdue,
+            days_until,
+            days_old,
+        )
         
         return {
             "score": score,
             "priority": priority,
-            "reason": "; ".join(reasons) if reasons else "Default scoring",
+            "reason": reason,
             "should_print": score >= self.print_threshold,
             "label_title": label_title,
             "label_description": label_description,
@@ -392,6 +517,8 @@ Respond JSON only (same language as email):
     def score_tasks(self, tasks: TaskList) -> list[tuple[Task, dict]]:
         """
         Score plusieurs tâches.
+        Avec le LLM, les requêtes sont envoyées en parallèle
+        (au plus MAX_CONCURRENT_REQUESTS à la fois).
         
         Args:
             tasks: Liste de tâches à analyser
@@ -399,11 +526,17 @@ Respond JSON only (same language as email):
         Returns:
             Liste de tuples (task, scoring_result)
         """
-        results = []
-        for task in tasks:
-            scoring = self.score_task(task)
-            results.append((task, scoring))
-        return results
+        # Même date de référence pour tout le lot
+        today = datetime.now()
+        
+        if not self.is_configured or len(tasks) < 2:
+            return [(task, self.score_task(task, today)) for task in tasks]
+        
+        # Appels réseau indépendants: les paralléliser (ordre conservé par map)
+        max_workers = min(self.MAX_CONCURRENT_REQUESTS, len(tasks))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            scorings = list(executor.map(self.score_task, tasks, repeat(today)))
+        return list(zip(tasks, scorings))
     
     def filter_for_printing(self, tasks: TaskList, threshold: Optional[int] = None) -> TaskList:
         """
@@ -420,18 +553,19 @@ Respond JSON only (same language as email):
         
         scored = self.score_tasks(tasks)
         
-        # Filtrer et trier
-        to_print = [
-            (task, scoring) for task, scoring in scored
-            if scoring["score"] >= threshold
-        ]
-        
-        # Trier par score décroissant
-        to_print.sort(key=lambda x: x[1]["score"], reverse=True)
+        # Filtrer et trier par score décroissant: on trie les indices retenus
+        # (clé = list.__getitem__, sans lambda) puis on parcourt la permutation
+        scores = [scoring["score"] for _, scoring in scored]
+        order = sorted(
+            (i for i, score in enumerate(scores) if score >= threshold),
+            key=scores.__getitem__,
+            reverse=True,
+        )
         
         # Mettre à jour la priorité des tâches selon le scoring
         result = []
-        for task, scoring in to_print:
+        for i in order:
+            task, scoring = scored[i]
             task.priority = scoring["priority"]
             result.append(task)
         
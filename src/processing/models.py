@@ -4,12 +4,24 @@ Définit les structures Task et Label utilisées dans toute l'application.
 """
 
 import hashlib
+import sys
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
+from functools import cache
 from typing import Optional
 
 
+def _normalize_datetime(dt: Optional[datetime]) -> Optional[datetime]:
+    """Convertit un datetime en naive UTC pour comparaison."""
+    if dt is None:
+        return None
+    # Si aware (a une timezone), convertir en UTC puis rendre naive
+    if dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
 class Priority(Enum):
     """Niveaux de priorité des tâches."""
     LOW = "low"
@@ -20,20 +32,38 @@ class Priority(Enum):
     @classmethod
     def from_string(cls, value: str) -> "Priority":
         """Convertit une chaîne en Priority (avec fallback)."""
-        value_lower = value.lower().strip()
-        mapping = {
-            "low": cls.LOW,
-            "basse": cls.LOW,
-            "medium": cls.MEDIUM,
-            "moyenne": cls.MEDIUM,
-            "normal": cls.MEDIUM,
-            "high": cls.HIGH,
-            "haute": cls.HIGH,
-            "urgent": cls.URGENT,
-            "urgente": cls.URGENT,
-            "critique": cls.URGENT,
-        }
-        return mapping.get(value_lower, cls.MEDIUM)
+        return _priority_from_string(value)
+
+
+# Correspondance texte -> Priority (construite une seule fois à l'import)
+_PRIORITY_MAP: dict[str, Priority] = {
+    "low": Priority.LOW,
+    "basse": Priority.LOW,
+    "medium": Priority.MEDIUM,
+    "moyenne": Priority.MEDIUM,
+    "normal": Priority.MEDIUM,
+    "high": Priority.HIGH,
+    "haute": Priority.HIGH,
+    "urgent": Priority.URGENT,
+    "urgente": Priority.URGENT,
+    "critique": Priority.URGENT,
+}
+
+
+# Peu de valeurs distinctes en entrée ("high", "medium"...): cache non borné
+@cache
+def _priority_from_string(value: str) -> Priority:
+    """Implémentation mémoïsée de Priority.from_string."""
+    return _PRIORITY_MAP.get(value.lower().strip(), Priority.MEDIUM)
+
+
+# Symbole visuel de chaque priorité (toutes les valeurs de Priority sont couvertes)
+_PRIORITY_SYMBOLS: dict[Priority, str] = {
+    Priority.LOW: "○",
+    Priority.MEDIUM: "●",
+    Priority.HIGH: "▲",
+    Priority.URGENT: "⚠",
+}
 
 
 class TaskStatus(Enum):
@@ -44,7 +74,7 @@ class TaskStatus(Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """
     Représente une tâche provenant de n'importe quelle source.
@@ -71,11 +101,26 @@ class Task:
     # Données brutes de la source (pour debug/traçabilité)
     raw_data: Optional[dict] = None
     
+    # Dates normalisées en naive UTC (calculées une fois, utilisées pour le scoring)
+    created_at_utc: Optional[datetime] = field(default=None, init=False, repr=False, compare=False)
+    due_date_utc: Optional[datetime] = field(default=None, init=False, repr=False, compare=False)
+    
+    # Cache de content_hash (slot, cached_property n'étant pas compatible avec slots=True)
+    _content_hash: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    
     def __post_init__(self):
         """Validation après initialisation."""
         # Tronquer le titre si trop long
         if len(self.title) > 100:
             self.title = self.title[:97] + "..."
+        
+        # Vocabulaire réduit: une seule instance de chaque chaîne en mémoire
+        self.source = sys.intern(self.source)
+        if self.category:
+            self.category = sys.intern(self.category)
+        
+        self.created_at_utc = _normalize_datetime(self.created_at)
+        self.due_date_utc = _normalize_datetime(self.due_date)
     
     @property
     def short_title(self) -> str:
@@ -94,13 +139,7 @@ class Task:
     @property
     def priority_symbol(self) -> str:
         """Symbole visuel de priorité."""
-        symbols = {
-            Priority.LOW: "○",
-            Priority.MEDIUM: "●",
-            Priority.HIGH: "▲",
-            Priority.URGENT: "⚠",
-        }
-        return symbols.get(self.priority, "●")
+        return _PRIORITY_SYMBOLS[self.priority]
     
     @property
     def content_hash(self) -> str:
@@ -112,25 +151,79 @@ class Task:
         
         Pour les emails extraits par LLM, utilise les données source originales
         plus un index pour distinguer plusieurs tâches du même email.
+        
+        Calculé au premier accès puis conservé dans _content_hash.
         """
+        if self._content_hash is None:
+            self._content_hash = hash_fields(self._content_fields())
+        return self._content_hash
+    
+    @property
+    def legacy_content_hash(self) -> str:
+        """
+        Ancien hash de contenu (SHA-256 tronqué), tel qu'enregistré en base
+        avant le passage à BLAKE2b: sert à reconnaître les tâches déjà imprimées.
+        """
+        return legacy_hash_fields(self._content_fields())
+    
+    def _content_fields(self) -> tuple:
+        """Champs source hashés pour content_hash."""
         # Pour les tâches extraites d'emails, utiliser les données source
         if self.raw_data and self.raw_data.get("extracted_from_email"):
             # Utiliser l'ID Gmail original et le sujet original
             gmail_id = self.raw_data.get("gmail_id", "")
             original_subject = self.raw_data.get("original_subject", "")
             # Extraire l'index de la tâche depuis l'ID (ex: "gmail-pro-abc123-task1" -> "task1")
-            task_index = self.id.split("-")[-1] if "-task" in self.id else "task1"
-            content = f"{self.source}|{gmail_id}|{original_subject}|{task_index}"
+            idx = self.id.rfind("-task")
+            task_index = self.id[idx + 1:] if idx >= 0 else "task1"
+            fields = (self.source, gmail_id, original_subject, task_index)
         else:
             # Pour les autres sources, utiliser id + title + description
-            content = f"{self.source}|{self.id}|{self.title}|{self.description or ''}"
+            fields = (self.source, self.id, self.title, self.description or "")
         
-        content = content.lower().strip()
-        hash_obj = hashlib.sha256(content.encode("utf-8"))
-        return hash_obj.hexdigest()[:16]
+        return fields
+
+
+# Table de passage en minuscules pour les octets ASCII (A-Z -> a-z)
+_ASCII_LOWER = bytes.maketrans(bytes(range(65, 91)), bytes(range(97, 123)))
+
+
+def hash_fields(fields: tuple) -> str:
+    """
+    Hash BLAKE2b 64 bits de "champ1|champ2|...", en minuscules et sans espaces
+    aux extrémités. Les champs sont hashés un par un (pas de chaîne intermédiaire).
+    """
+    # BLAKE2b 64 bits: directement 16 caractères hex, plus rapide que SHA-256
+    hash_obj = hashlib.blake2b(digest_size=8)
+    last = len(fields) - 1
+    for i, value in enumerate(fields):
+        value = str(value)
+        ascii_only = value.isascii()
+        if not ascii_only:
+            value = value.lower()
+        # Équivalent du strip() appliqué à la chaîne complète
+        if i == 0:
+            value = value.lstrip()
+        if i == last:
+            value = value.rstrip()
+        if ascii_only:
+            # Cas courant (ids, sources): minuscules directement sur les octets
+            data = value.encode("ascii").translate(_ASCII_LOWER)
+        else:
+            data = value.encode("utf-8")
+        hash_obj.update(data)
+        if i != last:
+            hash_obj.update(b"|")
+    return hash_obj.hexdigest()
+
+
+def legacy_hash_fields(fields: tuple) -> str:
+    """Ancien hash (SHA-256 tronqué à 16 caractères) des mêmes champs que hash_fields."""
+    content = "|".join(str(value) for value in fields).lower().strip()
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
 
 
-@dataclass
+@dataclass(slots=True)
 class Label:
     """
     Représente une étiquette à imprimer.
@@ -173,7 +266,8 @@ class Label:
         description = scoring.get("label_description") or task.description
         
         # Ligne 1: Titre (priorité + texte)
-        line1 = f"{task.priority_symbol} {title}"
+        symbol = task.priority_symbol
+        line1 = symbol + " " + title
         
         # Ligne 2: Description (le label_generator gère le wrapping)
         line2 = description.strip() if description else None
@@ -182,16 +276,17 @@ class Label:
         meta_parts = []
         reason = scoring.get("reason", "")
         if reason:
-            meta_parts.append(f"→ {reason}")
-        if task.due_date_str:
-            meta_parts.append(f"📅 {task.due_date_str}")
+            meta_parts.append("→ " + reason)
+        due_date_str = task.due_date_str
+        if due_date_str:
+            meta_parts.append("📅 " + due_date_str)
         line3 = " ".join(meta_parts) if meta_parts else None
         
         return cls(
             line1=line1,
             line2=line2,
             line3=line3,
-            priority_indicator=task.priority_symbol,
+            priority_indicator=symbol,
             reason=reason,
             task_id=task.id,
             source=task.source,
@@ -3,15 +3,88 @@ Database - Stockage SQLite des tâches imprimées.
 Permet d'éviter la réimpression de tâches déjà traitées.
 """
 
-import hashlib
 import sqlite3
+import sys
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
+from src.processing.models import hash_fields
 
-@dataclass
+
+def _datetime_to_ms(value: datetime) -> int:
+    """Convertit un datetime en millisecondes depuis l'epoch (INTEGER SQLite)."""
+    return int(value.timestamp() * 1000)
+
+
+def _ms_to_datetime(value: Optional[int]) -> Optional[datetime]:
+    """Convertit une valeur TIMESTAMP_MS lue en base en datetime local."""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value / 1000)
+
+
+# Les dates sont stockées en INTEGER (ms) plutôt qu'en texte ISO-8601:
+# lignes plus petites, pas de parsing à la lecture, comparaisons entières.
+# Pas de detect_types à la connexion: la conversion inverse est faite à la main
+# (_ms_to_datetime) là où un datetime est nécessaire.
+sqlite3.register_adapter(datetime, _datetime_to_ms)
+
+# Valeur par défaut SQL équivalente à _datetime_to_ms(datetime.now())
+_NOW_MS_SQL = "(CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER))"
+
+# Schéma: tables puis index, exécutés instruction par instruction. Pas
+# d'executescript(): il valide la transaction en cours, ce qui casserait la
+# migration transactionnelle. Le coût au démarrage est évité autrement: une
+# base déjà au schéma courant ne réexécute aucun DDL (voir _init_db)
+_SCHEMA_TABLES = (
+    # Table des tâches imprimées
+    f"""
+    CREATE TABLE IF NOT EXISTS printed_tasks (
+        task_hash TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        source_id TEXT,
+        original_title TEXT NOT NULL,
+        label_title TEXT NOT NULL,
+        label_description TEXT,
+        score INTEGER NOT NULL,
+        printed_at TIMESTAMP_MS INTEGER DEFAULT {_NOW_MS_SQL}
+    )
+    """,
+    # Table des emails/sources déjà traités (pour éviter de re-appeler le LLM)
+    f"""
+    CREATE TABLE IF NOT EXISTS processed_sources (
+        source_hash TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        source_id TEXT NOT NULL,
+        original_title TEXT NOT NULL,
+        tasks_extracted INTEGER DEFAULT 0,
+        processed_at TIMESTAMP_MS INTEGER DEFAULT {_NOW_MS_SQL}
+    )
+    """,
+    # Hashes de printed_tasks encore au format d'avant BLAKE2b (SHA-256
+    # tronqué), en attente de conversion par adopt_legacy_hashes
+    "CREATE TABLE IF NOT EXISTS legacy_task_hashes (task_hash TEXT PRIMARY KEY)",
+)
+
+_SCHEMA_INDEXES = (
+    # Index pour recherches par source
+    "CREATE INDEX IF NOT EXISTS idx_source ON printed_tasks(source)",
+    # Index couvrant pour recherches par date: get_recent_tasks est servi
+    # par l'index seul, sans relire les lignes de la table
+    """
+    CREATE INDEX IF NOT EXISTS idx_printed_at_cover ON printed_tasks(
+        printed_at DESC, task_hash, source, original_title,
+        label_title, label_description, score, source_id
+    )
+    """,
+    # Index pour processed_sources
+    "CREATE INDEX IF NOT EXISTS idx_processed_source ON processed_sources(source)",
+)
+
+
+@dataclass(slots=True)
 class PrintedTask:
     """Représente une tâche imprimée stockée en base."""
     task_hash: str  # Hash unique basé sur le contenu source
@@ -22,6 +95,16 @@ class PrintedTask:
     score: int
     printed_at: datetime
     source_id: Optional[str] = None  # ID original de la source (email id, etc.)
+    
+    # Colonnes SQL dans l'ordre des champs, pour une construction positionnelle
+    COLUMNS = (
+        "task_hash, source, original_title, label_title, "
+        "label_description, score, printed_at, source_id"
+    )
+    
+    def __post_init__(self):
+        # Peu de sources distinctes: partager une seule instance de chaque chaîne
+        self.source = sys.intern(self.source)
 
 
 class TaskDatabase:
@@ -35,6 +118,12 @@ class TaskDatabase:
     
     DEFAULT_DB_PATH = Path("data/printed_tasks.db")
     
+    # Version du schéma (PRAGMA user_version), voir _migrate()
+    SCHEMA_VERSION = 4
+    
+    # Nombre max de paramètres par requête IN (limite SQLite par défaut: 999)
+    IN_CHUNK_SIZE = 900
+    
     def __init__(self, db_path: Optional[Path] = None):
         """
         Initialise la connexion à la base de données.
@@ -45,64 +134,125 @@ class TaskDatabase:
         self.db_path = db_path or self.DEFAULT_DB_PATH
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._conn: Optional[sqlite3.Connection] = None
+        
+        # Résultats des vérifications de sources déjà faites (hash -> présent en base),
+        # pour éviter de réinterroger SQLite pendant un même run
+        self._processed_cache: dict[str, bool] = {}
+        
+        # Ensemble exact des task_hash en base, chargé au premier besoin puis
+        # tenu à jour par mark_*: seule référence pour les tâches imprimées.
+        # Les écritures d'autres connexions n'y figurent pas: clear_cache()
+        # doit être appelé avant chaque cycle de filtrage
+        self._printed_hashes: Optional[set[str]] = None
+        self._legacy_hashes: Optional[set[str]] = None
+        
         self._init_db()
     
     def _init_db(self):
-        """Crée les tables si elles n'existent pas."""
+        """Crée les tables si elles n'existent pas et applique les migrations."""
         conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Table des tâches imprimées
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS printed_tasks (
-                task_hash TEXT PRIMARY KEY,
-                source TEXT NOT NULL,
-                source_id TEXT,
-                original_title TEXT NOT NULL,
-                label_title TEXT NOT NULL,
-                label_description TEXT,
-                score INTEGER NOT NULL,
-                printed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # Cas courant (base à jour): une seule lecture de PRAGMA, aucun DDL
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= self.SCHEMA_VERSION:
+            return
         
-        # Table des emails/sources déjà traités (pour éviter de re-appeler le LLM)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS processed_sources (
-                source_hash TEXT PRIMARY KEY,
-                source TEXT NOT NULL,
-                source_id TEXT NOT NULL,
-                original_title TEXT NOT NULL,
-                tasks_extracted INTEGER DEFAULT 0,
-                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        # Une seule transaction, verrou d'écriture pris d'emblée: une migration
+        # interrompue laisse la base dans son état précédent
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            is_new = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'printed_tasks'"
+            ).fetchone() is None
+            
+            # Base neuve: créée directement au schéma courant, rien à migrer
+            if not is_new and version < self.SCHEMA_VERSION:
+                self._migrate(conn, version)
+            self._create_schema(conn)
+            
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection, indexes: bool = True):
+        """Crée les tables (et index) manquants, dans la transaction en cours."""
+        for statement in _SCHEMA_TABLES + (_SCHEMA_INDEXES if indexes else ()):
+            conn.execute(statement)
+    
+    def _migrate(self, conn: sqlite3.Connection, version: int):
+        """Applique les migrations en attente depuis `version` (PRAGMA user_version)."""
+        if version < 1:
+            # v1: hashes SHA-256 tronqués -> BLAKE2b 64 bits.
+            # Les hashes de source se recalculent depuis (source, source_id).
+            # Ceux de printed_tasks dépendent de données non stockées: ils sont
+            # réécrits à la volée quand la tâche réapparaît (adopt_legacy_hashes).
+            rows = conn.execute(
+                "SELECT source_hash, source, source_id FROM processed_sources"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE processed_sources SET source_hash = ? WHERE source_hash = ?",
+                [
+                    (self.compute_source_hash(row["source"], row["source_id"]), row["source_hash"])
+                    for row in rows
+                ]
             )
-        """)
-        
-        # Index pour recherches par source
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_source ON printed_tasks(source)
-        """)
-        
-        # Index pour recherches par date
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_printed_at ON printed_tasks(printed_at)
-        """)
         
-        # Index pour processed_sources
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_processed_source ON processed_sources(source)
-        """)
-        
-        conn.commit()
+        if version < 2:
+            # v2: dates en INTEGER (ms depuis l'epoch) au lieu de texte ISO-8601.
+            # SQLite ne sait pas changer le type d'une colonne: on reconstruit
+            # les tables en convertissant les dates existantes. Les anciens index
+            # suivent les tables renommées puis disparaissent avec elles: ils
+            # sont recréés par _create_schema() après la migration.
+            tables = {"printed_tasks": "printed_at", "processed_sources": "processed_at"}
+            for table in tables:
+                conn.execute(f"ALTER TABLE {table} RENAME TO {table}_v1")
+            self._create_schema(conn, indexes=False)
+            
+            for table, date_column in tables.items():
+                columns = [
+                    row["name"] for row in conn.execute(f"PRAGMA table_info({table}_v1)")
+                    if row["name"] != date_column
+                ]
+                column_list = ", ".join(columns)
+                rows = conn.execute(
+                    f"SELECT {column_list}, {date_column} FROM {table}_v1"
+                ).fetchall()
+                conn.executemany(
+                    f"INSERT INTO {table} ({column_list}, {date_column}) "
+                    f"VALUES ({', '.join('?' * (len(columns) + 1))})",
+                    [
+                        (*row[:-1], datetime.fromisoformat(row[-1]) if row[-1] else None)
+                        for row in rows
+                    ]
+                )
+                conn.execute(f"DROP TABLE {table}_v1")
+        
+        if version < 3:
+            # v3: idx_printed_at remplacé par l'index couvrant idx_printed_at_cover
+            conn.execute("DROP INDEX IF EXISTS idx_printed_at")
+        
+        if version < 4:
+            # v4: suivi des hashes SHA-256 restant à convertir. Avant v1 ce sont
+            # toutes les lignes; entre v1 et v3 les deux formats sont
+            # indiscernables: toutes restent candidates jusqu'à conversion ou purge
+            self._create_schema(conn, indexes=False)
+            conn.execute("INSERT OR IGNORE INTO legacy_task_hashes SELECT task_hash FROM printed_tasks")
     
     def _get_connection(self) -> sqlite3.Connection:
         """Retourne une connexion à la base (lazy loading)."""
         if self._conn is None:
-            self._conn = sqlite3.connect(
-                str(self.db_path),
-                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
-            )
+            self._conn = sqlite3.connect(str(self.db_path))
             self._conn.row_factory = sqlite3.Row
+            
+            # WAL + synchronous=NORMAL: écritures bien plus rapides, durabilité
+            # suffisante ici (journal_mode est persistant, le reste par connexion)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("PRAGMA cache_size=-20000")  # 20 Mo
+            self._conn.execute("PRAGMA mmap_size=268435456")  # 256 Mo
         return self._conn
     
     @staticmethod
@@ -120,15 +270,9 @@ class TaskDatabase:
             description: Description ou snippet (optionnel)
             
         Returns:
-            Hash SHA256 tronqué à 16 caractères
+            Hash BLAKE2b 64 bits (16 caractères hex)
         """
-        # Normaliser les entrées
-        content = f"{source}|{source_id}|{title}|{description or ''}"
-        content = content.lower().strip()
-        
-        # Calculer le hash
-        hash_obj = hashlib.sha256(content.encode("utf-8"))
-        return hash_obj.hexdigest()[:16]
+        return hash_fields((source, source_id, title, description or ""))
     
     @staticmethod
     def compute_source_hash(source: str, source_id: str) -> str:
@@ -140,12 +284,9 @@ class TaskDatabase:
             source_id: ID unique dans la source (gmail_id, task_id, etc.)
             
         Returns:
-            Hash SHA256 tronqué à 16 caractères
+            Hash BLAKE2b 64 bits (16 caractères hex)
         """
-        content = f"{source}|{source_id}"
-        content = content.lower().strip()
-        hash_obj = hashlib.sha256(content.encode("utf-8"))
-        return hash_obj.hexdigest()[:16]
+        return hash_fields((source, source_id))
     
     def is_source_processed(self, source: str, source_id: str) -> bool:
         """
@@ -159,6 +300,10 @@ class TaskDatabase:
             True si la source a déjà été traitée
         """
         source_hash = self.compute_source_hash(source, source_id)
+        cached = self._processed_cache.get(source_hash)
+        if cached is not None:
+            return cached
+        
         conn = self._get_connection()
         cursor = conn.cursor()
         
@@ -167,7 +312,28 @@ class TaskDatabase:
             (source_hash,)
         )
         
-        return cursor.fetchone() is not None
+        processed = cursor.fetchone() is not None
+        self._processed_cache[source_hash] = processed
+        return processed
+    
+    def filter_sources_processed(self, sources: Iterable[tuple[str, str]]) -> set[tuple[str, str]]:
+        """
+        Version par lot de is_source_processed.
+        
+        Args:
+            sources: Couples (source, source_id) à vérifier
+            
+        Returns:
+            Ensemble des couples (source, source_id) déjà traités
+        """
+        by_hash = {
+            self.compute_source_hash(source, source_id): (source, source_id)
+            for source, source_id in sources
+        }
+        found = self._select_existing_hashes(
+            "processed_sources", "source_hash", by_hash, self._processed_cache
+        )
+        return {by_hash[source_hash] for source_hash in found}
     
     def mark_source_processed(
         self,
@@ -194,9 +360,12 @@ class TaskDatabase:
         
         try:
             cursor.execute("""
-                INSERT OR REPLACE INTO processed_sources 
+                INSERT INTO processed_sources 
                 (source_hash, source, source_id, original_title, tasks_extracted, processed_at)
                 VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(source_hash) DO UPDATE SET
+                    tasks_extracted = excluded.tasks_extracted,
+                    processed_at = excluded.processed_at
             """, (
                 source_hash,
                 source,
@@ -206,6 +375,7 @@ class TaskDatabase:
                 datetime.now()
             ))
             conn.commit()
+            self._processed_cache[source_hash] = True
             return True
         except Exception:
             return False
@@ -220,15 +390,124 @@ class TaskDatabase:
         Returns:
             True si la tâche existe déjà en base
         """
+        return task_hash in self._get_printed_hashes()
+    
+    def filter_already_printed(self, task_hashes: Iterable[str]) -> set[str]:
+        """
+        Version par lot de is_already_printed.
+        
+        Args:
+            task_hashes: Hashes des tâches à vérifier
+            
+        Returns:
+            Ensemble des hashes déjà présents en base
+        """
+        printed_hashes = self._get_printed_hashes()
+        return {task_hash for task_hash in task_hashes if task_hash in printed_hashes}
+    
+    @property
+    def has_legacy_hashes(self) -> bool:
+        """Reste-t-il des lignes enregistrées sous l'ancien hash (à convertir) ?"""
+        return bool(self._get_legacy_hashes())
+    
+    def adopt_legacy_hashes(self, legacy_to_new: dict[str, str]) -> set[str]:
+        """
+        Reconnaît les tâches imprimées avant le passage à BLAKE2b: les lignes
+        enregistrées sous l'ancien hash sont réécrites avec le nouveau.
+        Inutile une fois has_legacy_hashes faux.
+        
+        Args:
+            legacy_to_new: Ancien hash (SHA-256 tronqué) -> nouveau hash, pour
+                des tâches dont le nouveau hash est absent de la base
+            
+        Returns:
+            Ensemble des nouveaux hashes désormais présents en base
+        """
+        legacy_hashes = self._get_legacy_hashes()
+        renames = [
+            (new_hash, legacy_hash)
+            for legacy_hash, new_hash in legacy_to_new.items()
+            if legacy_hash in legacy_hashes
+        ]
+        if not renames:
+            return set()
+        
+        conn = self._get_connection()
+        conn.executemany(
+            "UPDATE OR IGNORE printed_tasks SET task_hash = ? WHERE task_hash = ?",
+            renames
+        )
+        conn.executemany(
+            "DELETE FROM legacy_task_hashes WHERE task_hash = ?",
+            [(legacy_hash,) for _, legacy_hash in renames]
+        )
+        conn.commit()
+        
+        for new_hash, legacy_hash in renames:
+            legacy_hashes.discard(legacy_hash)
+            if self._printed_hashes is not None:
+                self._printed_hashes.discard(legacy_hash)
+                self._printed_hashes.add(new_hash)
+        return {new_hash for new_hash, _ in renames}
+    
+    def _get_legacy_hashes(self) -> set[str]:
+        """Charge (une fois) les hashes d'avant BLAKE2b restant à convertir."""
+        if self._legacy_hashes is None:
+            cursor = self._get_connection().execute("SELECT task_hash FROM legacy_task_hashes")
+            self._legacy_hashes = {row[0] for row in cursor}
+        return self._legacy_hashes
+    
+    def _get_printed_hashes(self) -> set[str]:
+        """Charge (une fois) l'ensemble des task_hash présents en base."""
+        if self._printed_hashes is None:
+            cursor = self._get_connection().execute("SELECT task_hash FROM printed_tasks")
+            self._printed_hashes = {row[0] for row in cursor}
+        return self._printed_hashes
+    
+    def _remember_printed(self, task_hashes: Iterable[str]):
+        """Ajoute des hashes à l'ensemble en mémoire, seulement s'il est déjà chargé."""
+        if self._printed_hashes is not None:
+            self._printed_hashes.update(task_hashes)
+    
+    def _select_existing_hashes(
+        self,
+        table: str,
+        column: str,
+        hashes: Iterable[str],
+        cache: dict[str, bool]
+    ) -> set[str]:
+        """
+        Retourne les hashes de `hashes` présents dans table.column (clé primaire).
+        Seuls les hashes absents du cache sont recherchés en base, puis mis en cache.
+        """
+        found: set[str] = set()
+        missing: list[str] = []
+        for task_hash in dict.fromkeys(hashes):
+            cached = cache.get(task_hash)
+            if cached is None:
+                missing.append(task_hash)
+            elif cached:
+                found.add(task_hash)
+        
+        if not missing:
+            return found
+        
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        cursor.execute(
-            "SELECT 1 FROM printed_tasks WHERE task_hash = ?",
-            (task_hash,)
-        )
+        for i in range(0, len(missing), self.IN_CHUNK_SIZE):
+            chunk = missing[i:i + self.IN_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT {column} FROM {table} WHERE {column} IN ({placeholders})",
+                chunk
+            )
+            found.update(row[0] for row in cursor.fetchall())
+        
+        for task_hash in missing:
+            cache[task_hash] = task_hash in found
         
-        return cursor.fetchone() is not None
+        return found
     
     def mark_as_printed(
         self,
@@ -274,11 +553,43 @@ class TaskDatabase:
                 datetime.now()
             ))
             conn.commit()
+            self._remember_printed((task_hash,))
             return True
         except sqlite3.IntegrityError:
             # Déjà existant (clé primaire dupliquée)
+            self._remember_printed((task_hash,))
             return False
     
+    def mark_many_printed(self, rows: list[tuple]) -> int:
+        """
+        Enregistre plusieurs tâches imprimées en une seule transaction.
+        
+        Args:
+            rows: Tuples (task_hash, source, source_id, original_title,
+                  label_title, label_description, score, printed_at)
+            
+        Returns:
+            Nombre de tâches réellement insérées (les doublons sont ignorés)
+        """
+        if not rows:
+            return 0
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        # sqlite3 ouvre la transaction implicitement avant l'INSERT:
+        # un seul commit (donc un seul fsync) pour tout le lot
+        cursor.executemany("""
+            INSERT OR IGNORE INTO printed_tasks 
+            (task_hash, source, source_id, original_title, label_title, label_description, score, printed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        
+        self._remember_printed(row[0] for row in rows)
+        
+        return cursor.rowcount
+    
     def get_printed_task(self, task_hash: str) -> Optional[PrintedTask]:
         """
         Récupère les détails d'une tâche imprimée.
@@ -309,7 +620,7 @@ class TaskDatabase:
             label_title=row["label_title"],
             label_description=row["label_description"],
             score=row["score"],
-            printed_at=row["printed_at"]
+            printed_at=_ms_to_datetime(row["printed_at"])
         )
     
     def get_recent_tasks(self, limit: int = 50) -> list[PrintedTask]:
@@ -325,22 +636,15 @@ class TaskDatabase:
         conn = self._get_connection()
         cursor = conn.cursor()
         
+        # Tuples simples (pas de sqlite3.Row): construction positionnelle
+        cursor.row_factory = None
         cursor.execute(
-            "SELECT * FROM printed_tasks ORDER BY printed_at DESC LIMIT ?",
+            f"SELECT {PrintedTask.COLUMNS} FROM printed_tasks ORDER BY printed_at DESC LIMIT ?",
             (limit,)
         )
         
         return [
-            PrintedTask(
-                task_hash=row["task_hash"],
-                source=row["source"],
-                source_id=row["source_id"],
-                original_title=row["original_title"],
-                label_title=row["label_title"],
-                label_description=row["label_description"],
-                score=row["score"],
-                printed_at=row["printed_at"]
-            )
+            PrintedTask(*row[:6], _ms_to_datetime(row[6]), row[7])
             for row in cursor.fetchall()
         ]
     
@@ -354,22 +658,18 @@ class TaskDatabase:
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        # Total
-        cursor.execute("SELECT COUNT(*) FROM printed_tasks")
-        total = cursor.fetchone()[0]
-        
-        # Par source
+        # Un seul parcours de la table: total et moyenne déduits des agrégats par source
         cursor.execute("""
-            SELECT source, COUNT(*) as count 
+            SELECT source, COUNT(*) as count, SUM(score) as score_sum
             FROM printed_tasks 
             GROUP BY source 
             ORDER BY count DESC
         """)
-        by_source = {row["source"]: row["count"] for row in cursor.fetchall()}
+        rows = cursor.fetchall()
         
-        # Moyenne des scores
-        cursor.execute("SELECT AVG(score) FROM printed_tasks")
-        avg_score = cursor.fetchone()[0] or 0
+        by_source = {row["source"]: row["count"] for row in rows}
+        total = sum(by_source.values())
+        avg_score = sum(row["score_sum"] for row in rows) / total if total else 0
         
         return {
             "total": total,
@@ -390,16 +690,32 @@ class TaskDatabase:
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            DELETE FROM printed_tasks 
-            WHERE printed_at < datetime('now', ?)
-        """, (f"-{days} days",))
+        cutoff_ms = _datetime_to_ms(datetime.now() - timedelta(days=days))
+        cursor.execute(
+            "DELETE FROM printed_tasks WHERE printed_at < ?",
+            (cutoff_ms,)
+        )
         
         deleted = cursor.rowcount
+        if deleted:
+            cursor.execute(
+                "DELETE FROM legacy_task_hashes "
+                "WHERE task_hash NOT IN (SELECT task_hash FROM printed_tasks)"
+            )
         conn.commit()
         
+        if deleted:
+            self._printed_hashes = None
+            self._legacy_hashes = None
+        
         return deleted
     
+    def clear_cache(self):
+        """Vide les caches de vérification (à appeler entre deux runs)."""
+        self._processed_cache.clear()
+        self._printed_hashes = None
+        self._legacy_hashes = None
+    
     def close(self):
         """Ferme la connexion à la base."""
         if self._conn:
@@ -407,6 +723,7 @@ class TaskDatabase:
             self._conn = None
     
     def __enter__(self):
+        self.clear_cache()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
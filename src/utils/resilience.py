@@ -4,16 +4,23 @@ Pour permettre au script de tourner en arrière-plan de manière robuste.
 """
 
 import logging
+import random
+import re
+import threading
 import time
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
-from functools import wraps
-from typing import Callable, Optional, TypeVar, Any
+from functools import lru_cache, wraps
+from typing import Callable, Literal, Optional, TypeVar, Any
 
 # Configuration du logging
 logger = logging.getLogger("kanbanprinter")
 
+# Liaisons locales au module (évite les lookups d'attribut dans la boucle de retry)
+_sleep = time.sleep
+_rand = random.random
+
 
 class ErrorSeverity(Enum):
     """Niveau de sévérité des erreurs."""
@@ -22,26 +29,35 @@ class ErrorSeverity(Enum):
     FATAL = "fatal"              # Erreur fatale (config manquante) - arrêt
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RetryConfig:
-    """Configuration pour les retries."""
+    """
+    Configuration pour les retries.
+    Immuable: with_retry précalcule les délais à la décoration.
+    """
     max_retries: int = 3
     base_delay: float = 1.0          # Délai initial en secondes
     max_delay: float = 300.0         # Délai max (5 minutes)
     exponential_base: float = 2.0    # Facteur d'augmentation
-    jitter: float = 0.1              # Variance aléatoire (10%)
+    jitter: float = 0.1              # Variance aléatoire (10%), mode "none" uniquement
+    # Répartition aléatoire des délais (évite que tous les clients réessaient ensemble):
+    # - "full": uniforme entre 0 et le délai exponentiel
+    # - "equal": moitié fixe + moitié aléatoire
+    # - "none": délai exponentiel + variance `jitter` (ancien comportement)
+    jitter_mode: Literal["full", "equal", "none"] = "full"
+    # Sévérités reconnues pour lesquelles on réessaie (par défaut: erreurs
+    # transitoires; une erreur d'auth remonte tout de suite pour être traitée).
+    # Les erreurs non reconnues par classify_error sont toujours réessayées.
+    retry_on: frozenset[ErrorSeverity] = frozenset({ErrorSeverity.TRANSIENT})
 
 
-@dataclass
+@dataclass(slots=True)
 class SourceHealth:
     """État de santé d'une source de données."""
     source_name: str
     is_healthy: bool = True
     consecutive_failures: int = 0
-    last_success: Optional[datetime] = None
-    last_failure: Optional[datetime] = None
     last_error: Optional[str] = None
-    next_retry: Optional[datetime] = None
     total_failures: int = 0
     total_successes: int = 0
     
@@ -49,55 +65,144 @@ class SourceHealth:
     failure_threshold: int = 5       # Nombre d'échecs avant "ouverture"
     recovery_timeout: float = 300.0  # Temps avant réessai (5 minutes)
     
+    # État du circuit (fermé -> ouvert après failure_threshold échecs ->
+    # semi-ouvert après recovery_timeout: un seul essai "sonde" à la fois,
+    # refermé par un succès, rouvert par un échec). Horloge monotone.
+    state: Literal["closed", "open", "half_open"] = "closed"
+    _next_retry_monotonic: float = field(default=0.0, init=False, repr=False)
+    
+    # Échéance de la sonde en cours (0 = aucune). Une sonde qui ne rapporte
+    # jamais son résultat expire après recovery_timeout, une autre est alors permise.
+    _probe_deadline: float = field(default=0.0, init=False, repr=False)
+    _probe_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+    
+    # Horodatages en secondes (time.time(), 0 = jamais): les datetime ne sont
+    # construits qu'à la lecture (last_success, last_failure, next_retry)
+    _last_success_ts: float = field(default=0.0, init=False, repr=False)
+    _last_failure_ts: float = field(default=0.0, init=False, repr=False)
+    
+    @property
+    def last_success(self) -> Optional[datetime]:
+        """Date du dernier succès."""
+        return datetime.fromtimestamp(self._last_success_ts) if self._last_success_ts else None
+    
+    @property
+    def last_failure(self) -> Optional[datetime]:
+        """Date du dernier échec."""
+        return datetime.fromtimestamp(self._last_failure_ts) if self._last_failure_ts else None
+    
+    @property
+    def next_retry(self) -> Optional[datetime]:
+        """
+        Date du prochain essai autorisé: fin du timeout de récupération, ou
+        expiration de la sonde en cours (None si aucun essai n'est en attente).
+        """
+        deadline = self._probe_deadline if self.state == "half_open" else self._next_retry_monotonic
+        if not deadline:
+            return None
+        return datetime.fromtimestamp(time.time() + (deadline - time.monotonic()))
+    
     @property
     def is_circuit_open(self) -> bool:
         """Le circuit est-il ouvert (source désactivée temporairement) ?"""
-        if self.consecutive_failures < self.failure_threshold:
+        if self.state == "open" and time.monotonic() >= self._next_retry_monotonic:
+            # Timeout de récupération passé: un essai sonde est permis
+            self.state = "half_open"
+        return self.state == "open"
+    
+    @property
+    def is_probing(self) -> bool:
+        """Une sonde (semi-ouvert) est-elle en cours et non expirée ?"""
+        return self._probe_deadline > time.monotonic()
+    
+    def try_acquire(self) -> bool:
+        """
+        Réserve un appel à la source: toujours accordé circuit fermé, jamais
+        circuit ouvert, et en semi-ouvert à un seul appelant (la sonde) à la fois.
+        Un appel accordé doit être suivi de record_success ou record_failure.
+        """
+        if self.is_circuit_open:
             return False
-        
-        # Vérifier si le timeout de récupération est passé
-        if self.next_retry and datetime.now() >= self.next_retry:
-            return False  # Permettre un nouvel essai
-        
-        return True
+        if self.state != "half_open":
+            return True
+        with self._probe_lock:
+            if self.is_probing:
+                return False
+            self._probe_deadline = time.monotonic() + self.recovery_timeout
+            return True
     
     def record_success(self):
         """Enregistre un succès."""
         self.is_healthy = True
         self.consecutive_failures = 0
-        self.last_success = datetime.now()
+        self._last_success_ts = time.time()
         self.total_successes += 1
-        self.next_retry = None
         self.last_error = None
+        self.state = "closed"
+        self._next_retry_monotonic = 0.0
+        self._probe_deadline = 0.0
     
     def record_failure(self, error: str):
         """Enregistre un échec."""
         self.consecutive_failures += 1
         self.total_failures += 1
-        self.last_failure = datetime.now()
+        self._last_failure_ts = time.time()
         self.last_error = error
         
-        if self.consecutive_failures >= self.failure_threshold:
+        # Sonde en échec (semi-ouvert) ou seuil atteint: (ré)ouvrir le circuit
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
             self.is_healthy = False
-            self.next_retry = datetime.now() + timedelta(seconds=self.recovery_timeout)
+            self.state = "open"
+            self._next_retry_monotonic = time.monotonic() + self.recovery_timeout
+        self._probe_deadline = 0.0
 
 
 class SourceHealthMonitor:
-    """Moniteur de santé pour toutes les sources."""
+    """
+    Moniteur de santé pour toutes les sources.
+    
+    Utilisable depuis plusieurs threads: seule la création d'une entrée est
+    protégée par un verrou, les lectures de dict restent sans verrou (atomiques
+    sous le GIL). Les mises à jour de SourceHealth (compteurs, dates) sont de
+    simples affectations, suffisamment atomiques pour ce suivi.
+    """
     
-    def __init__(self):
+    def __init__(self, min_poll_interval: float = 0.0):
+        """
+        Args:
+            min_poll_interval: Durée (secondes) pendant laquelle get_summary
+                renvoie le même résumé au lieu de le recalculer (0 = jamais)
+        """
         self._sources: dict[str, SourceHealth] = {}
+        self._lock = threading.Lock()
+        self.min_poll_interval = min_poll_interval
+        self._summary_cache: Optional[tuple[float, dict]] = None  # (monotonic, résumé)
     
     def get_health(self, source_name: str) -> SourceHealth:
         """Récupère ou crée l'état de santé d'une source."""
-        if source_name not in self._sources:
-            self._sources[source_name] = SourceHealth(source_name=source_name)
-        return self._sources[source_name]
+        health = self._sources.get(source_name)
+        if health is not None:
+            return health
+        with self._lock:
+            return self._sources.setdefault(source_name, SourceHealth(source_name=source_name))
     
     def should_skip(self, source_name: str) -> bool:
-        """Vérifie si une source doit être ignorée (circuit ouvert)."""
+        """
+        Vérifie si une source doit être ignorée (circuit ouvert, ou semi-ouvert
+        avec une sonde déjà en cours). Simple consultation, sans effet de bord:
+        pour réserver l'appel, utiliser try_acquire.
+        """
         health = self.get_health(source_name)
-        return health.is_circuit_open
+        return health.is_circuit_open or health.is_probing
+    
+    def try_acquire(self, source_name: str) -> bool:
+        """
+        Réserve un appel à la source (voir SourceHealth.try_acquire). Si True,
+        l'appelant doit ensuite appeler record_success ou record_failure.
+        """
+        return self.get_health(source_name).try_acquire()
     
     def record_success(self, source_name: str):
         """Enregistre un succès pour une source."""
@@ -109,21 +214,56 @@ class SourceHealthMonitor:
     
     def get_summary(self) -> dict:
         """Résumé de l'état de toutes les sources."""
-        return {
-            name: {
+        now = time.monotonic()
+        cached = self._summary_cache
+        if cached is not None and now - cached[0] < self.min_poll_interval:
+            return cached[1]
+        
+        with self._lock:
+            items = list(self._sources.items())
+        
+        summary = {}
+        for name, health in items:
+            summary[name] = {
                 "healthy": health.is_healthy,
                 "failures": health.consecutive_failures,
                 "last_error": health.last_error,
                 "circuit_open": health.is_circuit_open,
+                "circuit_state": health.state,
             }
-            for name, health in self._sources.items()
-        }
+        
+        if self.min_poll_interval > 0:
+            self._summary_cache = (now, summary)
+        return summary
 
 
 # Instance globale du moniteur
 health_monitor = SourceHealthMonitor()
 
 
+# Motifs de classification (sous-chaînes recherchées dans le message en minuscules),
+# compilés une fois en une seule regex par sévérité: un seul parcours du message
+_TRANSIENT_PATTERNS = (
+    "timeout", "timed out", "connection", "network",
+    "rate limit", "quota", "too many requests", "429",
+    "503", "502", "504", "temporarily unavailable",
+    "ssl", "certificate", "handshake",
+    "reset by peer", "broken pipe",
+)
+_RECOVERABLE_PATTERNS = (
+    "token", "expired", "invalid_grant", "unauthorized",
+    "401", "403", "refresh", "credentials",
+)
+_TRANSIENT_RE = re.compile("|".join(map(re.escape, _TRANSIENT_PATTERNS)))
+_RECOVERABLE_RE = re.compile("|".join(map(re.escape, _RECOVERABLE_PATTERNS)))
+
+# Types d'exceptions toujours transitoires (vérifiés avant le message)
+_TRANSIENT_TYPES = frozenset({
+    "TimeoutError", "ConnectionError", "ConnectionResetError",
+    "BrokenPipeError", "OSError", "socket.error",
+})
+
+
 def classify_error(error: Exception) -> ErrorSeverity:
     """
     Classifie une erreur selon sa sévérité.
@@ -134,48 +274,55 @@ def classify_error(error: Exception) -> ErrorSeverity:
     Returns:
         ErrorSeverity indiquant comment gérer l'erreur
     """
-    error_str = str(error).lower()
-    error_type = type(error).__name__
+    return _classify_detailed(error)[0]
+
+
+def _classify_detailed(error: Exception) -> tuple[ErrorSeverity, bool]:
+    """
+    Comme classify_error, mais indique aussi si la sévérité vient d'un motif
+    ou d'un type reconnu (True) ou du cas par défaut (False).
+    """
+    # Cas le plus courant (erreurs réseau): le type suffit, pas besoin du message
+    if type(error).__name__ in _TRANSIENT_TYPES:
+        return ErrorSeverity.TRANSIENT, True
     
+    return _classify_message(str(error).lower())
+
+
+@lru_cache(maxsize=512)
+def _classify_message(error_msg: str) -> tuple[ErrorSeverity, bool]:
+    """
+    Classification mémoïsée sur le message en minuscules: une source en échec
+    répète souvent exactement la même erreur.
+    """
     # Erreurs transitoires (réseau, rate limiting)
-    transient_patterns = [
-        "timeout", "timed out", "connection", "network",
-        "rate limit", "quota", "too many requests", "429",
-        "503", "502", "504", "temporarily unavailable",
-        "ssl", "certificate", "handshake",
-        "reset by peer", "broken pipe",
-    ]
-    
-    for pattern in transient_patterns:
-        if pattern in error_str:
-            return ErrorSeverity.TRANSIENT
+    if _TRANSIENT_RE.search(error_msg):
+        return ErrorSeverity.TRANSIENT, True
     
     # Erreurs récupérables (authentification)
-    recoverable_patterns = [
-        "token", "expired", "invalid_grant", "unauthorized",
-        "401", "403", "refresh", "credentials",
-    ]
-    
-    for pattern in recoverable_patterns:
-        if pattern in error_str:
-            return ErrorSeverity.RECOVERABLE
-    
-    # Certains types d'exceptions sont toujours transitoires
-    transient_exceptions = [
-        "TimeoutError", "ConnectionError", "ConnectionResetError",
-        "BrokenPipeError", "OSError", "socket.error",
-    ]
-    
-    if error_type in transient_exceptions:
-        return ErrorSeverity.TRANSIENT
+    if _RECOVERABLE_RE.search(error_msg):
+        return ErrorSeverity.RECOVERABLE, True
     
     # Par défaut, considérer comme récupérable (pas fatal)
-    return ErrorSeverity.RECOVERABLE
+    return ErrorSeverity.RECOVERABLE, False
 
 
 T = TypeVar('T')
 
 
+@lru_cache(maxsize=32)
+def _backoff_schedule(config: RetryConfig) -> tuple[float, ...]:
+    """
+    Délais exponentiels plafonnés d'une config, avant jitter. Calculés au premier
+    retry seulement (rien sur le chemin sans erreur) puis partagés entre toutes
+    les fonctions décorées avec une config égale, même redécorées à chaque appel.
+    """
+    return tuple(
+        min(config.base_delay * (config.exponential_base ** attempt), config.max_delay)
+        for attempt in range(config.max_retries)
+    )
+
+
 def with_retry(
     config: Optional[RetryConfig] = None,
     on_retry: Optional[Callable[[int, Exception], None]] = None,
@@ -201,51 +348,55 @@ def with_retry(
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         @wraps(func)
         def wrapper(*args, **kwargs) -> T:
-            import random
-            
-            last_exception = None
-            
             for attempt in range(config.max_retries + 1):
                 try:
                     return func(*args, **kwargs)
                     
                 except Exception as e:
-                    last_exception = e
-                    severity = classify_error(e)
+                    severity, recognized = _classify_detailed(e)
                     
                     # Ne pas retry les erreurs fatales
                     if severity == ErrorSeverity.FATAL:
-                        logger.error(f"Erreur fatale: {e}")
+                        logger.error("Erreur fatale: %s", e)
+                        raise
+                    
+                    # Ne pas retry les erreurs reconnues qui ne se corrigeront pas
+                    # seules (auth...). Une erreur inconnue (ex: HTTP 500) est
+                    # classée RECOVERABLE par défaut mais reste réessayée.
+                    if recognized and severity not in config.retry_on:
+                        logger.warning("Erreur non réessayable (%s): %s", severity.value, e)
                         raise
                     
                     # Dernier essai ?
                     if attempt >= config.max_retries:
-                        logger.warning(f"Échec après {config.max_retries} tentatives: {e}")
+                        logger.warning("Échec après %d tentatives: %s", config.max_retries, e)
                         raise
                     
-                    # Calculer le délai avec backoff exponentiel
-                    delay = min(
-                        config.base_delay * (config.exponential_base ** attempt),
-                        config.max_delay
-                    )
+                    # Délai avec backoff exponentiel (calculé au premier retry, par config)
+                    capped = _backoff_schedule(config)[attempt]
                     
                     # Ajouter du jitter pour éviter les "thundering herds"
-                    jitter_amount = delay * config.jitter * random.random()
-                    delay += jitter_amount
+                    if config.jitter_mode == "full":
+                        delay = _rand() * capped
+                    elif config.jitter_mode == "equal":
+                        delay = capped * 0.5 + _rand() * capped * 0.5
+                    else:
+                        delay = capped + capped * config.jitter * _rand()
                     
                     # Callback de retry
                     if on_retry:
                         on_retry(attempt + 1, e)
-                    else:
+                    elif logger.isEnabledFor(logging.INFO):
+                        # Formatage différé: rien n'est construit si INFO est filtré
                         logger.info(
-                            f"Retry {attempt + 1}/{config.max_retries} après {delay:.1f}s "
-                            f"({type(e).__name__}: {str(e)[:50]})"
+                            "Retry %d/%d après %.1fs (%s: %.50s)",
+                            attempt + 1, config.max_retries, delay, type(e).__name__, e
                         )
                     
-                    time.sleep(delay)
+                    _sleep(delay)
             
-            # Ne devrait jamais arriver, mais au cas où
-            raise last_exception
+            # Inaccessible: le dernier essai relance l'exception dans la boucle
+            raise AssertionError("unreachable")
         
         return wrapper
     return decorator
@@ -271,17 +422,41 @@ def safe_execute(
     Returns:
         Tuple (résultat, exception) - exception est None si succès
     """
+    # Spécialisation choisie une fois à l'entrée plutôt que testée sur chaque chemin
+    if source_name:
+        return _safe_execute_monitored(func, source_name, default, *args, **kwargs)
+    return _safe_execute_bare(func, default, *args, **kwargs)
+
+
+def _safe_execute_monitored(
+    func: Callable[..., T],
+    source_name: str,
+    default: Optional[T],
+    *args,
+    **kwargs
+) -> tuple[Optional[T], Optional[Exception]]:
+    """safe_execute avec suivi de santé de la source."""
     try:
         result = func(*args, **kwargs)
-        
-        if source_name:
-            health_monitor.record_success(source_name)
-        
+        health_monitor.record_success(source_name)
         return result, None
         
     except Exception as e:
-        if source_name:
-            health_monitor.record_failure(source_name, str(e))
+        health_monitor.record_failure(source_name, str(e))
+        logger.error("Erreur safe_execute: %s", e)
+        return default, e
+
+
+def _safe_execute_bare(
+    func: Callable[..., T],
+    default: Optional[T],
+    *args,
+    **kwargs
+) -> tuple[Optional[T], Optional[Exception]]:
+    """safe_execute sans monitoring."""
+    try:
+        return func(*args, **kwargs), None
         
-        logger.error(f"Erreur safe_execute: {e}")
+    except Exception as e:
+        logger.error("Erreur safe_execute: %s", e)
         return default, e
@@ -3,7 +3,9 @@ Script de test du pipeline complet KanbanPrinter.
 JSON → Task → Label → Image → (Print simulation)
 """
 
+import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Ajouter le chemin du projet
@@ -13,11 +15,16 @@ sys.path.insert(0, str(PROJECT_ROOT))
 from src.inputs.local_json import LocalJsonInput
 from src.processing.models import Label
 from src.output.label_generator import LabelGenerator
-from src.output.printer import Printer
+from src.output.printer import get_printer
 
 
-def test_full_pipeline():
-    """Test du pipeline complet."""
+def test_full_pipeline(serial: bool = False):
+    """
+    Test du pipeline complet.
+    
+    Args:
+        serial: Générer les images une par une (debug) au lieu d'en parallèle
+    """
     
     print("=" * 50)
     print("🧪 TEST PIPELINE KANBANPRINTER")
@@ -49,21 +56,27 @@ def test_full_pipeline():
     print("\n🖼️  3. Génération des images...")
     
     generator = LabelGenerator()
+    generator.warmup()
     print(f"   Dimensions: {generator.width}x{generator.height} px")
     
     output_dir = PROJECT_ROOT / "output"
     output_dir.mkdir(exist_ok=True)
     
-    generated_files = []
-    for label in labels:
-        output_path = generator.generate_and_save(label)
-        generated_files.append(output_path)
+    if serial or len(labels) < 2:
+        generated_files = [generator.generate_and_save(label) for label in labels]
+    else:
+        # Images indépendantes: Pillow libère le GIL pendant le rendu et l'écriture
+        # (le générateur ne garde aucun état par appel, il peut être partagé)
+        with ThreadPoolExecutor(max_workers=min(8, len(labels))) as executor:
+            generated_files = list(executor.map(generator.generate_and_save, labels))
+    
+    for output_path in generated_files:
         print(f"   ✅ {output_path.name}")
     
     # === 4. Test impression (simulation) ===
     print("\n🖨️  4. Test d'impression...")
     
-    printer = Printer()
+    printer = get_printer()
     print(f"   Module win32 disponible: {printer.is_available}")
     print(f"   Imprimante configurée: {printer.printer_name}")
     
@@ -92,4 +105,12 @@ def test_full_pipeline():
 
 
 if __name__ == "__main__":
-    test_full_pipeline()
+    parser = argparse.ArgumentParser(description="Test du pipeline KanbanPrinter")
+    parser.add_argument(
+        "--serial",
+        action="store_true",
+        help="Générer les étiquettes séquentiellement (debug)"
+    )
+    args = parser.parse_args()
+    
+    test_full_pipeline(serial=args.serial)
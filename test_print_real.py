@@ -11,7 +11,7 @@ sys.path.insert(0, str(PROJECT_ROOT))
 
 from src.processing.models import Task, Label, Priority
 from src.output.label_generator import LabelGenerator
-from src.output.printer import Printer
+from src.output.printer import get_printer
 from datetime import datetime
 
 
@@ -45,7 +45,7 @@ def print_test_label():
     print(f"📁 Image sauvegardée: {debug_path}")
     
     # Imprimer
-    printer = Printer()
+    printer = get_printer()
     
     if not printer.is_available:
         print("❌ win32print non disponible")
@@ -0,0 +1,246 @@
+"""
+Tests de la base SQLite des tâches imprimées.
+"""
+
+import hashlib
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from src.processing.models import Task
+from src.storage.database import TaskDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = TaskDatabase(tmp_path / "printed_tasks.db")
+    yield database
+    database.close()
+
+
+# Schéma d'origine (avant user_version): dates en texte ISO-8601, hashes SHA-256
+_BASELINE_SCHEMA = """
+    CREATE TABLE printed_tasks (
+        task_hash TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        source_id TEXT,
+        original_title TEXT NOT NULL,
+        label_title TEXT NOT NULL,
+        label_description TEXT,
+        score INTEGER NOT NULL,
+        printed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE processed_sources (
+        source_hash TEXT PRIMARY KEY,
+        source TEXT NOT NULL,
+        source_id TEXT NOT NULL,
+        original_title TEXT NOT NULL,
+        tasks_extracted INTEGER DEFAULT 0,
+        processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_source ON printed_tasks(source);
+    CREATE INDEX idx_printed_at ON printed_tasks(printed_at);
+    CREATE INDEX idx_processed_source ON processed_sources(source);
+"""
+
+
+def _legacy_hash(content: str) -> str:
+    return hashlib.sha256(content.lower().strip().encode("utf-8")).hexdigest()[:16]
+
+
+def _user_version(path) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestMigration:
+    """Ouverture d'une base existante ou neuve."""
+    
+    @pytest.fixture
+    def baseline_path(self, tmp_path):
+        path = tmp_path / "baseline.db"
+        conn = sqlite3.connect(path)
+        conn.executescript(_BASELINE_SCHEMA)
+        conn.execute(
+            "INSERT INTO printed_tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ("0123456789abcdef", "google_tasks", "t1", "Faire X", "X", "", 80,
+             "2024-01-02 10:30:00.123000"),
+        )
+        conn.execute(
+            "INSERT INTO processed_sources VALUES (?, ?, ?, ?, ?, ?)",
+            (_legacy_hash("gmail:pro|abc"), "gmail:pro", "abc", "Sujet", 2,
+             "2024-01-02 10:00:00"),
+        )
+        conn.commit()
+        conn.close()
+        return path
+    
+    def test_new_database_is_stamped(self, tmp_path):
+        path = tmp_path / "new.db"
+        TaskDatabase(path).close()
+        assert _user_version(path) == TaskDatabase.SCHEMA_VERSION
+    
+    def test_up_to_date_database_runs_no_ddl(self, tmp_path, monkeypatch):
+        path = tmp_path / "current.db"
+        TaskDatabase(path).close()
+        
+        def fail(*args, **kwargs):
+            raise AssertionError("schéma recréé sur une base à jour")
+        
+        monkeypatch.setattr(TaskDatabase, "_create_schema", staticmethod(fail))
+        TaskDatabase(path).close()
+    
+    def test_baseline_database_is_migrated(self, baseline_path):
+        with TaskDatabase(baseline_path) as db:
+            task = db.get_printed_task("0123456789abcdef")
+            assert task.printed_at == datetime(2024, 1, 2, 10, 30, 0, 123000)
+            assert db.is_source_processed("gmail:pro", "abc")
+            assert db.get_recent_tasks()[0].label_title == "X"
+        
+        assert _user_version(baseline_path) == TaskDatabase.SCHEMA_VERSION
+        conn = sqlite3.connect(baseline_path)
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        conn.close()
+        assert "printed_tasks_v1" not in names
+        assert "idx_printed_at" not in names
+        assert {"idx_source", "idx_printed_at_cover", "idx_processed_source"} <= names
+    
+    def test_failed_migration_leaves_database_unchanged(self, baseline_path, monkeypatch):
+        def fail(*args, **kwargs):
+            raise RuntimeError("arrêt pendant la migration")
+        
+        monkeypatch.setattr("src.storage.database.datetime", type(
+            "BrokenDatetime", (), {"fromisoformat": staticmethod(fail)}
+        ))
+        with pytest.raises(RuntimeError):
+            TaskDatabase(baseline_path)
+        monkeypatch.undo()
+        
+        assert _user_version(baseline_path) == 0
+        with TaskDatabase(baseline_path) as db:
+            assert db.is_already_printed("0123456789abcdef")
+
+
+class TestPrintedHashes:
+    """Ensemble en mémoire des tâches imprimées."""
+    
+    def test_mark_does_not_load_hash_set(self, db):
+        assert db.mark_as_printed("aaaaaaaaaaaaaaaa", "local_json", "T", "T", "", 50)
+        assert db.mark_many_printed([
+            ("bbbbbbbbbbbbbbbb", "local_json", None, "T", "T", "", 50, datetime.now())
+        ]) == 1
+        assert db._printed_hashes is None
+        assert db.filter_already_printed(["aaaaaaaaaaaaaaaa", "bbbbbbbbbbbbbbbb", "cccccccccccccccc"]) == {
+            "aaaaaaaaaaaaaaaa", "bbbbbbbbbbbbbbbb"
+        }
+    
+    def test_loaded_hash_set_is_kept_up_to_date(self, db):
+        assert not db.is_already_printed("aaaaaaaaaaaaaaaa")
+        db.mark_as_printed("aaaaaaaaaaaaaaaa", "local_json", "T", "T", "", 50)
+        assert db.is_already_printed("aaaaaaaaaaaaaaaa")
+
+
+class TestWrites:
+    """Sémantique des écritures (INSERT OR IGNORE, UPSERT)."""
+    
+    def _row(self, task_hash: str, score: int = 50) -> tuple:
+        return (task_hash, "local_json", None, "T", "T", "", score, datetime(2024, 1, 2, 10, 0))
+    
+    def test_mark_many_printed_counts_only_new_rows(self, db):
+        assert db.mark_many_printed([self._row("aaaaaaaaaaaaaaaa"), self._row("bbbbbbbbbbbbbbbb")]) == 2
+        assert db.mark_many_printed([self._row("aaaaaaaaaaaaaaaa", 99), self._row("cccccccccccccccc")]) == 1
+        assert db.mark_many_printed([]) == 0
+        # Doublon ignoré: la ligne existante n'est pas écrasée
+        assert db.get_printed_task("aaaaaaaaaaaaaaaa").score == 50
+    
+    def test_mark_source_processed_upsert_updates_row(self, db, monkeypatch):
+        db.mark_source_processed("gmail:pro", "abc", "Sujet", tasks_extracted=1)
+        
+        later = datetime(2030, 1, 1, 12, 0)
+        monkeypatch.setattr("src.storage.database.datetime", type(
+            "FixedDatetime", (datetime,), {"now": classmethod(lambda cls: later)}
+        ))
+        assert db.mark_source_processed("gmail:pro", "abc", "Autre sujet", tasks_extracted=3)
+        
+        row = db._get_connection().execute(
+            "SELECT COUNT(*), tasks_extracted, processed_at, original_title FROM processed_sources"
+        ).fetchone()
+        assert row[0] == 1
+        assert row[1] == 3
+        assert row[2] == int(later.timestamp() * 1000)
+        # Le titre d'origine est conservé (seuls tasks_extracted et processed_at changent)
+        assert row[3] == "Sujet"
+        assert db.is_source_processed("gmail:pro", "abc")
+
+
+class TestStats:
+    """Statistiques calculées en un seul GROUP BY."""
+    
+    def test_empty_database(self, db):
+        assert db.get_stats() == {"total": 0, "by_source": {}, "average_score": 0}
+    
+    def test_totals_by_source_and_average(self, db):
+        for task_hash, source, score in (
+            ("aaaaaaaaaaaaaaaa", "gmail:pro", 90),
+            ("bbbbbbbbbbbbbbbb", "local_json", 50),
+            ("cccccccccccccccc", "gmail:pro", 71),
+        ):
+            db.mark_as_printed(task_hash, source, "T", "T", "", score)
+        
+        stats = db.get_stats()
+        assert stats["total"] == 3
+        assert list(stats["by_source"].items()) == [("gmail:pro", 2), ("local_json", 1)]
+        assert stats["average_score"] == 70.3
+
+
+class TestLegacyHashes:
+    """Tâches enregistrées sous l'ancien hash SHA-256 tronqué."""
+    
+    @pytest.fixture
+    def task(self) -> Task:
+        return Task(id="t1", source="google_tasks", title="Faire X", description="Détails")
+    
+    @pytest.fixture
+    def legacy_db(self, tmp_path, task):
+        path = tmp_path / "baseline.db"
+        conn = sqlite3.connect(path)
+        conn.executescript(_BASELINE_SCHEMA)
+        conn.execute(
+            "INSERT INTO printed_tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (task.legacy_content_hash, task.source, task.id, task.title, "X", "", 80,
+             "2024-01-02 10:30:00"),
+        )
+        conn.commit()
+        conn.close()
+        
+        database = TaskDatabase(path)
+        yield database
+        database.close()
+    
+    def test_legacy_row_is_adopted(self, legacy_db, task):
+        assert legacy_db.has_legacy_hashes
+        assert not legacy_db.filter_already_printed([task.content_hash])
+        assert legacy_db.adopt_legacy_hashes(
+            {task.legacy_content_hash: task.content_hash}
+        ) == {task.content_hash}
+        
+        legacy_db.clear_cache()
+        assert legacy_db.is_already_printed(task.content_hash)
+        assert not legacy_db.is_already_printed(task.legacy_content_hash)
+        assert legacy_db.get_printed_task(task.content_hash).source_id == "t1"
+        assert not legacy_db.has_legacy_hashes
+    
+    def test_unknown_legacy_hash_is_ignored(self, legacy_db):
+        task = Task(id="t2", source="google_tasks", title="Nouvelle tâche")
+        
+        assert legacy_db.adopt_legacy_hashes({task.legacy_content_hash: task.content_hash}) == set()
+        assert not legacy_db.is_already_printed(task.content_hash)
+        assert legacy_db.has_legacy_hashes
+    
+    def test_new_database_has_no_legacy_hashes(self, db, task):
+        db.mark_as_printed(task.content_hash, task.source, task.title, "X", "", 80, task.id)
+        assert not db.has_legacy_hashes
@@ -0,0 +1,25 @@
+"""
+Tests des prompts et formats de réponse du LLM.
+"""
+
+import json
+
+from src.processing import llm_parser
+
+
+def test_email_examples_match_response_schema():
+    """Les exemples few-shot ne montrent que des sorties acceptées par le schéma strict."""
+    item_schema = llm_parser._EMAIL_RESPONSE_FORMAT["json_schema"]["schema"]["properties"]["tasks"]["items"]
+    required = set(item_schema["required"])
+    priorities = set(item_schema["properties"]["priority"]["enum"])
+    
+    examples = [
+        json.loads(line.split("→", 1)[1])
+        for line in llm_parser._EMAIL_INSTRUCTIONS.splitlines()
+        if "→" in line
+    ]
+    assert examples
+    for example in examples:
+        for task in example["tasks"]:
+            assert set(task) == required
+            assert task["priority"] in priorities
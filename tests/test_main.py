@@ -0,0 +1,62 @@
+"""
+Tests du pipeline principal (filtrage des tâches déjà imprimées).
+"""
+
+import pytest
+
+from src.main import KanbanPrinter
+from src.processing.models import Task
+from src.storage.database import TaskDatabase
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Base temporaire (et non data/printed_tasks.db)
+    monkeypatch.setattr(TaskDatabase, "DEFAULT_DB_PATH", tmp_path / "printed_tasks.db")
+    kanban = KanbanPrinter(print_threshold=0, use_llm=False)
+    yield kanban
+    kanban.db.close()
+
+
+def _tasks() -> list[Task]:
+    return [Task(id=f"t{i}", source="local_json", title=f"Tâche {i}") for i in range(3)]
+
+
+class TestAnalyzeAndFilter:
+    """Filtrage des tâches avant scoring et impression."""
+    
+    def test_sees_tasks_printed_by_another_writer(self, app, tmp_path):
+        tasks = _tasks()
+        assert len(app.analyze_and_filter(tasks)) == 3
+        
+        # Un autre processus (run CLI pendant le daemon) imprime les tâches
+        other = TaskDatabase(tmp_path / "printed_tasks.db")
+        for task in tasks:
+            other.mark_as_printed(task.content_hash, task.source, task.title, task.title, "", 50, task.id)
+        other.close()
+        
+        assert app.analyze_and_filter(tasks) == []
+    
+    def test_skips_legacy_hashes_once_none_remain(self, app, monkeypatch):
+        def fail(task):
+            raise AssertionError("ancien hash calculé sans ligne à convertir")
+        
+        monkeypatch.setattr(Task, "legacy_content_hash", property(fail))
+        assert len(app.analyze_and_filter(_tasks())) == 3
+    
+    def test_scores_remaining_tasks_in_one_batch(self, app, monkeypatch):
+        tasks = _tasks()
+        app.db.mark_as_printed(tasks[0].content_hash, "local_json", "T", "T", "", 50, "t0")
+        batches = []
+        
+        def score_tasks(batch):
+            batches.append(list(batch))
+            return [(task, {"score": 90, "priority": task.priority}) for task in batch]
+        
+        app.use_llm = True
+        monkeypatch.setattr(type(app.parser), "is_configured", property(lambda parser: True))
+        monkeypatch.setattr(app.parser, "score_tasks", score_tasks)
+        
+        results = app.analyze_and_filter(tasks)
+        assert batches == [tasks[1:]]
+        assert [task for task, _ in results] == tasks[1:]
@@ -0,0 +1,134 @@
+"""
+Tests de l'impression GDI avec des modules win32 simulés.
+"""
+
+import sys
+import types
+
+import pytest
+from PIL import Image
+
+from src.output import printer as printer_module
+from src.output.printer import Printer, PrinterError
+
+
+class FakeDC:
+    """Device context enregistrant les appels GDI; échoue sur les pages listées."""
+    
+    def __init__(self, backend: "FakeWin32"):
+        self.backend = backend
+    
+    def CreatePrinterDC(self, name):
+        pass
+    
+    def StartDoc(self, name):
+        self.backend.events.append("StartDoc")
+    
+    def GetDeviceCaps(self, index):
+        return 400
+    
+    def StartPage(self):
+        self.backend.pages += 1
+        if self.backend.pages in self.backend.failing_pages:
+            raise RuntimeError("bourrage papier")
+        self.backend.events.append("StartPage")
+    
+    def EndPage(self):
+        self.backend.events.append("EndPage")
+    
+    def GetHandleOutput(self):
+        return 0
+    
+    def EndDoc(self):
+        self.backend.events.append("EndDoc")
+    
+    def AbortDoc(self):
+        self.backend.events.append("AbortDoc")
+    
+    def DeleteDC(self):
+        self.backend.events.append("DeleteDC")
+
+
+class FakeWin32:
+    """Modules win32print / win32ui / win32con minimaux."""
+    
+    def __init__(self):
+        self.events: list[str] = []
+        self.pages = 0
+        self.failing_pages: set[int] = set()
+        
+        self.win32print = types.ModuleType("win32print")
+        self.win32print.PRINTER_ENUM_LOCAL = 2
+        self.win32print.PRINTER_ENUM_CONNECTIONS = 4
+        self.win32print.EnumPrinters = lambda flags, name, level: [(0, "", "Munbyn", "")]
+        self.win32print.GetDefaultPrinter = lambda: "Munbyn"
+        
+        self.win32ui = types.ModuleType("win32ui")
+        self.win32ui.CreateDC = lambda: FakeDC(self)
+        
+        self.win32con = types.ModuleType("win32con")
+        self.win32con.HORZRES = 8
+        self.win32con.VERTRES = 10
+    
+    def documents(self) -> list[list[str]]:
+        """Événements regroupés par document (de StartDoc à DeleteDC)."""
+        documents = []
+        for event in self.events:
+            if event == "StartDoc":
+                documents.append([])
+            documents[-1].append(event)
+        return documents
+
+
+class FakeDib:
+    def __init__(self, image):
+        self.image = image
+    
+    def matches(self, image):
+        return False
+    
+    def draw(self, hdc, box):
+        pass
+
+
+@pytest.fixture
+def win32(monkeypatch):
+    backend = FakeWin32()
+    for name in ("win32print", "win32ui", "win32con"):
+        monkeypatch.setitem(sys.modules, name, getattr(backend, name))
+    monkeypatch.setattr(printer_module, "ImageWin_Dib", FakeDib)
+    return backend
+
+
+@pytest.fixture
+def labels() -> list[Image.Image]:
+    return [Image.new("1", (40, 20), 1) for _ in range(4)]
+
+
+class TestPrintImages:
+    """Lot d'étiquettes dans un document GDI, reprise après échec."""
+    
+    def test_batch_in_one_document(self, win32, labels):
+        assert Printer("Munbyn").print_images(labels) == 4
+        assert win32.documents() == [
+            ["StartDoc"] + ["StartPage", "EndPage"] * 4 + ["EndDoc", "DeleteDC"]
+        ]
+    
+    def test_failed_batch_is_aborted_then_printed_per_label(self, win32, labels):
+        win32.failing_pages = {3}
+        
+        assert Printer("Munbyn").print_images(labels) == 4
+        
+        batch, *singles = win32.documents()
+        assert batch == ["StartDoc", "StartPage", "EndPage", "StartPage", "EndPage", "AbortDoc", "DeleteDC"]
+        assert singles == [["StartDoc", "StartPage", "EndPage", "EndDoc", "DeleteDC"]] * 4
+    
+    def test_reports_labels_printed_before_failure(self, win32, labels):
+        # Page 3 du lot, puis 3e étiquette de la reprise (6e page au total)
+        win32.failing_pages = {3, 6}
+        
+        with pytest.raises(PrinterError) as error:
+            Printer("Munbyn").print_images(labels)
+        
+        assert error.value.pages_printed == 2
+        assert win32.documents()[-1] == ["StartDoc", "AbortDoc", "DeleteDC"]
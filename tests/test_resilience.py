@@ -0,0 +1,205 @@
+"""
+Tests des utilitaires de résilience (retry, circuit breaker).
+"""
+
+import random
+
+import pytest
+
+from src.utils import resilience
+from src.utils.resilience import RetryConfig, SourceHealthMonitor, with_retry
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """Supprime les attentes du backoff."""
+    monkeypatch.setattr(resilience, "_sleep", lambda delay: None)
+
+
+class FakeClock:
+    """Horloge monotone contrôlée par le test."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+def _count_calls(error: Exception, config: RetryConfig) -> int:
+    """Nombre d'appels effectués par with_retry avant de relancer `error`."""
+    calls = 0
+    
+    @with_retry(config)
+    def failing():
+        nonlocal calls
+        calls += 1
+        raise error
+    
+    with pytest.raises(type(error)):
+        failing()
+    return calls
+
+
+class TestWithRetry:
+    
+    def test_auth_error_is_not_retried(self):
+        error = RuntimeError("HttpError 401 unauthorized")
+        assert _count_calls(error, RetryConfig(max_retries=3)) == 1
+    
+    def test_unclassified_server_error_is_retried(self):
+        error = RuntimeError("HttpError 500 internal error")
+        assert _count_calls(error, RetryConfig(max_retries=3)) == 4
+    
+    def test_transient_error_is_retried(self):
+        error = RuntimeError("HttpError 503 service unavailable")
+        assert _count_calls(error, RetryConfig(max_retries=3)) == 4
+    
+    def test_retry_on_can_include_recoverable(self):
+        config = RetryConfig(
+            max_retries=2,
+            retry_on=frozenset({resilience.ErrorSeverity.TRANSIENT, resilience.ErrorSeverity.RECOVERABLE}),
+        )
+        assert _count_calls(RuntimeError("token expired"), config) == 3
+    
+    def test_success_computes_no_backoff(self):
+        resilience._backoff_schedule.cache_clear()
+        
+        @with_retry(RetryConfig(max_retries=3))
+        def ok():
+            return "ok"
+        
+        assert ok() == "ok"
+        assert resilience._backoff_schedule.cache_info().misses == 0
+    
+    def test_success_after_retry(self):
+        attempts = []
+        
+        @with_retry(RetryConfig(max_retries=3))
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise TimeoutError("timed out")
+            return "ok"
+        
+        assert flaky() == "ok"
+        assert len(attempts) == 2
+
+
+class TestJitter:
+    """Bornes des délais de backoff pour chaque jitter_mode (random seedé)."""
+    
+    CAPS = (1.0, 2.0, 4.0, 5.0, 5.0)
+    
+    def _delays(self, monkeypatch, **config) -> list[float]:
+        delays = []
+        monkeypatch.setattr(resilience, "_sleep", delays.append)
+        random.seed(0)
+        _count_calls(
+            TimeoutError("timed out"),
+            RetryConfig(max_retries=5, base_delay=1.0, exponential_base=2.0, max_delay=5.0, **config),
+        )
+        return delays
+    
+    def test_full_jitter_within_zero_and_cap(self, monkeypatch):
+        delays = self._delays(monkeypatch)
+        assert len(delays) == len(self.CAPS)
+        for delay, cap in zip(delays, self.CAPS):
+            assert 0.0 <= delay <= cap
+        # Étalés sur toute la fenêtre, pas collés au plafond
+        assert any(delay < cap * 0.5 for delay, cap in zip(delays, self.CAPS))
+    
+    def test_equal_jitter_within_half_cap_and_cap(self, monkeypatch):
+        delays = self._delays(monkeypatch, jitter_mode="equal")
+        for delay, cap in zip(delays, self.CAPS):
+            assert cap * 0.5 <= delay <= cap
+    
+    def test_no_jitter_mode_keeps_legacy_band(self, monkeypatch):
+        delays = self._delays(monkeypatch, jitter_mode="none", jitter=0.1)
+        for delay, cap in zip(delays, self.CAPS):
+            assert cap <= delay <= cap * 1.1
+    
+    def test_seeded_delays_are_reproducible(self, monkeypatch):
+        assert self._delays(monkeypatch) == self._delays(monkeypatch)
+
+
+class TestCircuitBreaker:
+    """Transitions fermé -> ouvert -> semi-ouvert -> fermé/ouvert."""
+    
+    def _open_monitor(self, clock) -> SourceHealthMonitor:
+        monitor = SourceHealthMonitor()
+        health = monitor.get_health("src")
+        health.failure_threshold = 2
+        health.recovery_timeout = 60.0
+        for _ in range(2):
+            assert monitor.try_acquire("src")
+            monitor.record_failure("src", "boom")
+        return monitor
+    
+    def test_closed_until_threshold(self, clock):
+        monitor = SourceHealthMonitor()
+        monitor.get_health("src").failure_threshold = 2
+        monitor.record_failure("src", "boom")
+        assert monitor.get_health("src").state == "closed"
+        assert not monitor.should_skip("src")
+        assert monitor.try_acquire("src")
+    
+    def test_opens_after_threshold(self, clock):
+        monitor = self._open_monitor(clock)
+        assert monitor.get_health("src").state == "open"
+        assert monitor.should_skip("src")
+        assert not monitor.try_acquire("src")
+    
+    def test_half_open_allows_single_probe(self, clock):
+        monitor = self._open_monitor(clock)
+        clock.now += 60.0
+        assert not monitor.should_skip("src")
+        assert monitor.get_health("src").state == "half_open"
+        assert monitor.try_acquire("src")
+        assert monitor.should_skip("src")
+        assert not monitor.try_acquire("src")
+    
+    def test_should_skip_does_not_reserve_probe(self, clock):
+        monitor = self._open_monitor(clock)
+        clock.now += 60.0
+        assert not monitor.should_skip("src")
+        assert not monitor.should_skip("src")
+        assert monitor.try_acquire("src")
+    
+    def test_probe_success_closes(self, clock):
+        monitor = self._open_monitor(clock)
+        clock.now += 60.0
+        assert monitor.try_acquire("src")
+        monitor.record_success("src")
+        health = monitor.get_health("src")
+        assert health.state == "closed"
+        assert health.next_retry is None
+        assert monitor.try_acquire("src")
+        assert monitor.try_acquire("src")
+    
+    def test_probe_failure_reopens(self, clock):
+        monitor = self._open_monitor(clock)
+        clock.now += 60.0
+        assert monitor.try_acquire("src")
+        monitor.record_failure("src", "still down")
+        assert monitor.get_health("src").state == "open"
+        assert not monitor.try_acquire("src")
+        clock.now += 60.0
+        assert monitor.try_acquire("src")
+    
+    def test_stale_probe_expires(self, clock):
+        monitor = self._open_monitor(clock)
+        clock.now += 60.0
+        assert monitor.try_acquire("src")
+        # La sonde ne rapporte jamais son résultat
+        clock.now += 59.0
+        assert not monitor.try_acquire("src")
+        clock.now += 1.0
+        assert monitor.try_acquire("src")